@@ -1,41 +1,23 @@
 import sys
 
 import pygame
-import random
 import time
-import os
-import sqlite3
-import datetime
-import tkinter as tk
-from tkinter import ttk
-import pandas as pd
-from solver import MinesweeperSolver
-
-# Инициализация микшера
-pygame.mixer.init()
-
-# Путь к папке со звуками
-base_path = os.path.dirname(__file__)
-sound_path = lambda name: os.path.join(base_path, 'res/sounds', name)
-
-# Загрузка звуков
-click_sound = pygame.mixer.Sound(sound_path('click.wav'))
-win_sound = pygame.mixer.Sound(sound_path('win.wav'))
-boom_sound = pygame.mixer.Sound(sound_path('lose.wav'))
-button_sound = pygame.mixer.Sound(sound_path('button.wav'))
-flag_sound = pygame.mixer.Sound(sound_path('flag.wav'))
 
-# Состояния клеток
-CELL_STATES = ['closed', 'opened', 'flagged', 'bombed', 'nobomb']
-
-DIFFICULTIES = {
-    'Легко': (9, 9, 10),
-    'Средне': (16, 16, 40),
-    'Сложно': (30, 16, 99)
-}
+import audio
+from profiler import PROFILE_PATH, profiler
+from replay import REPLAY_PATH, append_replays
+from game import CELL_STATES, DIFFICULTIES, Board, Game
+from solver import MinesweeperSolver
+from renderer import CELL_SIZE, BoardRenderer, Camera, draw_board, load_cell_images
+from stats import close_statistics_window, pump_statistics_window, show_statistics_window
+from ui_assets import OUTLINE_OFFSETS, UIAssets
 
-CELL_SIZE = 30
+# Размеры и цвета интерфейса
 UI_PANEL_HEIGHT = 70
+
+# Поле больше этого окна показывается через камеру с прокруткой и зумом
+MAX_VIEW_WIDTH = 1200
+MAX_VIEW_HEIGHT = 720
 FONT_COLOR = (0, 0, 0)
 
 WHITE = (255, 255, 255)
@@ -47,231 +29,136 @@ BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
 
 
-class Board:
-    def __init__(self, cols, rows, bombs_amount):
-        self.cols = cols
-        self.rows = rows
-        self.bombs_amount = bombs_amount
-        self.flags = 0
-        self.visible_board = [[CELL_STATES.index('closed')] * cols for _ in range(rows)]
-        self.hidden_board = [[0] * cols for _ in range(rows)]
-        self.bombs = []
-        self.init_bombs()
-
-    def init_bombs(self):
-        self.bombs = []
-
-    def place_bombs(self, first_click_x, first_click_y):
-        possible_positions = [(x, y) for x in range(self.cols) for y in range(self.rows)]
-
-        exclude = set()
-        for i in range(first_click_x - 1, first_click_x + 2):
-            for j in range(first_click_y - 1, first_click_y + 2):
-                if 0 <= i < self.cols and 0 <= j < self.rows:
-                    exclude.add((i, j))
-        possible_positions = [pos for pos in possible_positions if pos not in exclude]
-
-        self.bombs = random.sample(possible_positions, self.bombs_amount)
-        self.init_hidden_board()
-
-    def init_hidden_board(self):
-        for x in range(self.cols):
-            for y in range(self.rows):
-                if (x, y) in self.bombs:
-                    self.hidden_board[y][x] = -1
-                else:
-                    self.hidden_board[y][x] = self.count_bombs_around(x, y)
-
-    def count_bombs_around(self, x, y):
-        count = 0
-        for i in range(x - 1, x + 2):
-            for j in range(y - 1, y + 2):
-                if 0 <= i < self.cols and 0 <= j < self.rows:
-                    if (i, j) in self.bombs:
-                        count += 1
-        return count
-
-    def in_range(self, x, y):
-        return 0 <= x < self.cols and 0 <= y < self.rows
-
-
-class Game:
-    def __init__(self, cols, rows, bombs_amount, difficulty):
-        self.board = Board(cols, rows, bombs_amount)
-        self.cols = cols
-        self.rows = rows
-        self.flags = 0
-        self.closed_cells = cols * rows
-        self.state = 'playing'
-        self.start_time = None
-        self.elapsed_time = 0
-        self.first_click_done = False
-        self.result_saved = False
-        self.difficulty = difficulty
-
-    def reveal(self, x, y):
-        if not self.board.in_range(x, y):
-            return
-        if self.board.visible_board[y][x] != CELL_STATES.index('closed'):
-            return
-        if self.start_time is None:
-            self.start_time = time.time()
-
-        self.board.visible_board[y][x] = CELL_STATES.index('opened')
-        self.closed_cells -= 1
-
-        if self.board.hidden_board[y][x] == -1:
-            boom_sound.play()
-            self.state = 'lose'
-            self.elapsed_time = time.time() - self.start_time  # фиксируем время при проигрыше
-            self.reveal_all_cells()
-            if not self.result_saved:
-                save_game_result(self.difficulty, 'lose', self.elapsed_time)
-                print(f"[LOG] Saved result: {self.difficulty}, {self.state}, {self.elapsed_time}")
-                self.result_saved = True
-            return
-
-        click_sound.play()  # 🔈 Воспроизведение звука открытия
-
-        if self.board.hidden_board[y][x] == 0:
-            for i in range(x - 1, x + 2):
-                for j in range(y - 1, y + 2):
-                    if self.board.in_range(i, j) and self.board.visible_board[j][i] == CELL_STATES.index('closed'):
-                        self.reveal(i, j)
-
-        self.check_win()
-
-    def reveal_all_bombs(self):
-        for (x, y) in self.board.bombs:
-            if self.board.visible_board[y][x] != CELL_STATES.index('flagged'):
-                self.board.visible_board[y][x] = CELL_STATES.index('bombed')
-
-    def reveal_all_cells(self):
-        for y in range(self.rows):
-            for x in range(self.cols):
-                if self.board.visible_board[y][x] == CELL_STATES.index('closed'):
-                    if self.board.hidden_board[y][x] == -1:
-                        self.board.visible_board[y][x] = CELL_STATES.index('bombed')
-                    else:
-                        self.board.visible_board[y][x] = CELL_STATES.index('opened')
-
-    def on_left_click(self, x, y):
-        if self.state != 'playing':
-            return
-
-        if not self.first_click_done:
-            self.board.place_bombs(x, y)
-            self.first_click_done = True
-
-        if self.board.visible_board[y][x] == CELL_STATES.index('opened'):
-            bombs_around = self.board.hidden_board[y][x]
-            flags_around = 0
-            for i in range(x - 1, x + 2):
-                for j in range(y - 1, y + 2):
-                    if self.board.in_range(i, j):
-                        if self.board.visible_board[j][i] == CELL_STATES.index('flagged'):
-                            flags_around += 1
-            if flags_around == bombs_around:
-                for i in range(x - 1, x + 2):
-                    for j in range(y - 1, y + 2):
-                        if self.board.in_range(i, j):
-                            if self.board.visible_board[j][i] == CELL_STATES.index('closed'):
-                                self.reveal(i, j)
-        elif self.board.visible_board[y][x] == CELL_STATES.index('closed'):
-            self.reveal(x, y)
-
-    def on_right_click(self, x, y):
-        if self.state != 'playing':
-            return
-        flag_sound.play()
-        state = self.board.visible_board[y][x]
-        if state == CELL_STATES.index('closed'):
-            if self.flags < self.board.bombs_amount:
-                self.board.visible_board[y][x] = CELL_STATES.index('flagged')
-                self.flags += 1
-        elif state == CELL_STATES.index('flagged'):
-            self.board.visible_board[y][x] = CELL_STATES.index('closed')
-            self.flags -= 1
-
-    def check_win(self):
-        if self.closed_cells == self.board.bombs_amount and self.state == 'playing':
-            self.state = 'win'
-            self.elapsed_time = time.time() - self.start_time
-            self.reveal_all_cells()
-            win_sound.play()  # 🔈 Звук победы
-            if not self.result_saved:
-                save_game_result(self.difficulty, 'win', self.elapsed_time)
-                print(f"[LOG] Saved result: {self.difficulty}, {self.state}, {self.elapsed_time}")
-                self.result_saved = True
-
-
-def draw_board(screen, game, images):
-    for x in range(game.board.cols):
-        for y in range(game.board.rows):
-            cell = game.board.visible_board[y][x]
-            rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-
-            if cell == CELL_STATES.index('closed'):
-                screen.blit(images['closed'], rect)
-            elif cell == CELL_STATES.index('flagged'):
-                screen.blit(images['flagged'], rect)
-            elif cell == CELL_STATES.index('bombed'):
-                screen.blit(images['bombed'], rect)
-            elif cell == CELL_STATES.index('nobomb'):
-                screen.blit(images['noBomb'], rect)
-            elif cell == CELL_STATES.index('opened'):
-                num = game.board.hidden_board[y][x]
-                if num == -1:
-                    screen.blit(images['bomb'], rect)
-                else:
-                    screen.blit(images[f'num{num}'], rect)
-
-
-def draw_ui(screen, font, flags, bombs, timer, width, height, reset_imgs, game_state, rows):
-    panel_top = rows * CELL_SIZE + 5  # UI прямо под игровым полем
+def draw_ui(screen, font, flags, bombs, timer, width, height, reset_imgs, game_state, rows, board_height=None,
+            assets=None):
+    # Без общего кеша создаём временный - код отрисовки один и тот же
+    assets = assets or UIAssets(font)
+    if board_height is None:
+        board_height = rows * CELL_SIZE
+    panel_top = board_height + 5  # UI прямо под игровым полем
 
     panel_left = 10
     panel_right = width - 10
 
     # Счётчик бомб слева
-    bombs_text = font.render(f"Bomb: {bombs - flags}", True, BLACK)
+    bombs_text = assets.value('bombs', f"Bomb: {bombs - flags}", BLACK)
     screen.blit(bombs_text, (panel_left, panel_top))
 
     # Кнопка reset по центру
-    reset_img = reset_imgs['base']
-    if game_state == 'win':
-        reset_img = reset_imgs['win']
-    elif game_state == 'lose':
-        reset_img = reset_imgs['lose']
-
-    reset_img = pygame.transform.smoothscale(reset_img, (40, 40))
+    reset_state = game_state if game_state in ('win', 'lose') else 'base'
+    reset_img = assets.reset_image(reset_imgs, reset_state)
     reset_rect = reset_img.get_rect(center=(width // 2, panel_top + 20))
     screen.blit(reset_img, reset_rect)
 
     # Таймер справа
-    timer_text = font.render(f"Time: {int(timer)}", True, BLACK)
+    timer_text = assets.value('timer', f"Time: {int(timer)}", BLACK)
     timer_rect = timer_text.get_rect()
     screen.blit(timer_text, (panel_right - timer_rect.width, panel_top))
 
     return reset_rect
 
 
-def draw_message(screen, font, text, width, height, win=False):
+def draw_profile_overlay(screen, font, previous_rect=None):
+    # Процентили времени кадра и фаз (p50 / p90 / p99) поверх левого верхнего угла поля.
+    # Фон закрашивает и прошлую, возможно более широкую, надпись.
+    lines = ["F3 - профайлер, p50 / p90 / p99"] + profiler.summary_lines()
+    surfaces = [font.render(line, True, WHITE) for line in lines]
+    rect = pygame.Rect(0, 0, max(s.get_width() for s in surfaces) + 10,
+                       sum(s.get_height() for s in surfaces) + 10)
+    background = rect.union(previous_rect) if previous_rect else rect
+    screen.fill(BLACK, background)
+    y = 5
+    for surface in surfaces:
+        screen.blit(surface, (5, y))
+        y += surface.get_height()
+    return background
+
+
+def draw_message(screen, font, text, width, height, win=False, assets=None):
     color = BLACK if win else RED
     outline_color = BLACK
+    center = (width // 2, height // 2)
+
+    if assets is not None:
+        # Готовая поверхность с обводкой из кеша
+        surface = assets.message(font, text, color, outline_color)
+        rect = surface.get_rect(center=center)
+        screen.blit(surface, rect)
+        return rect
+
     text_surface = font.render(text, True, color)
-    text_rect = text_surface.get_rect(center=(width // 2, height // 2))
+    text_rect = text_surface.get_rect(center=center)
 
     # Рисуем обводку - текст смещаем на 1 пиксель в 8 направлениях чёрным
-    for dx, dy in [(-1, -1), (-1, 0), (-1, 1),
-                   (0, -1), (0, 1),
-                   (1, -1), (1, 0), (1, 1)]:
-        outline_surface = font.render(text, True, outline_color)
-        outline_rect = outline_surface.get_rect(center=(width // 2 + dx, height // 2 + dy))
+    outline_surface = font.render(text, True, outline_color)
+    for dx, dy in OUTLINE_OFFSETS:
+        outline_rect = outline_surface.get_rect(center=(center[0] + dx, center[1] + dy))
         screen.blit(outline_surface, outline_rect)
 
     # Рисуем основной текст поверх обводки
     screen.blit(text_surface, text_rect)
+    return text_rect.inflate(2, 2)
+
+
+def draw_buttons(screen, font, board_height, assets=None):
+    assets = assets or UIAssets(font)
+
+    # Кнопка "Сложность"
+    difficulty_button_x = 10
+    difficulty_button_y = board_height + UI_PANEL_HEIGHT  # сразу под UI-панелью
+
+    button_text = "Сложность"
+    button_padding_x = 10
+    button_padding_y = 5
+    btn_surf = assets.label(button_text, WHITE)
+    btn_rect = btn_surf.get_rect()
+    btn_rect.topleft = (difficulty_button_x + button_padding_x, difficulty_button_y + button_padding_y)
+    button_rect = pygame.Rect(difficulty_button_x,
+                              difficulty_button_y,
+                              btn_rect.width + 2 * button_padding_x,
+                              btn_rect.height + 2 * button_padding_y)
+    pygame.draw.rect(screen, BLUE, button_rect, border_radius=5)
+    screen.blit(btn_surf, btn_rect)
+
+    # Кнопка "Статистика"
+    stats_text = "Stats"
+    stats_surf = assets.label(stats_text, WHITE)
+    stats_rect = stats_surf.get_rect()
+
+    # Позиционируем кнопку от правого края
+    stats_button_width = stats_rect.width + 2 * button_padding_x
+    stats_button_height = stats_rect.height + 2 * button_padding_y
+    stats_button_x = screen.get_width() - stats_button_width - 10  # 10 px отступ от правого края
+    stats_button_y = difficulty_button_y  # на том же уровне
+
+    stats_rect.topleft = (stats_button_x + button_padding_x, stats_button_y + button_padding_y)
+    stats_button_rect = pygame.Rect(stats_button_x,
+                                    stats_button_y,
+                                    stats_button_width,
+                                    stats_button_height)
+    pygame.draw.rect(screen, BLUE, stats_button_rect, border_radius=5)
+    screen.blit(stats_surf, stats_rect)
+
+    # ---- Кнопка "Решить" ----
+
+    solve_text = "Solve"
+    solve_surf = assets.label(solve_text, WHITE)
+    solve_rect = solve_surf.get_rect()
+
+    solve_button_width = solve_rect.width + 2 * button_padding_x
+    solve_button_height = solve_rect.height + 2 * button_padding_y
+
+    # Располагаем под кнопкой "Статистика" с отступом 10 пикселей по вертикали
+    solve_button_x = stats_button_x
+    solve_button_y = stats_button_y + stats_button_height + 10
+
+    solve_rect.topleft = (solve_button_x + button_padding_x, solve_button_y + button_padding_y)
+    solve_button_rect = pygame.Rect(solve_button_x, solve_button_y, solve_button_width, solve_button_height)
+
+    pygame.draw.rect(screen, BLUE, solve_button_rect, border_radius=5)
+    screen.blit(solve_surf, solve_rect)
+
+    return button_rect, stats_rect, solve_rect
 
 
 def difficulty_menu(screen, font):
@@ -289,12 +176,11 @@ def difficulty_menu(screen, font):
     for i, level in enumerate(DIFFICULTIES.keys()):
         rect = pygame.Rect((width - button_width) // 2, start_y + i * (button_height + gap), button_width,
                            button_height)
-        buttons.append((level, rect))
+        buttons.append((level, rect, font.render(level, True, WHITE)))
     while menu_running:
         screen.fill(WHITE)
-        for level, rect in buttons:
+        for level, rect, text in buttons:
             pygame.draw.rect(screen, BLUE, rect)
-            text = font.render(level, True, WHITE)
             text_rect = text.get_rect(center=rect.center)
             screen.blit(text, text_rect)
 
@@ -307,101 +193,51 @@ def difficulty_menu(screen, font):
 
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 mx, my = event.pos
-                for level, rect in buttons:
+                for level, rect, _ in buttons:
                     if rect.collidepoint(mx, my):
-                        button_sound.play()
+                        audio.play('button')
                         selected = level
                         menu_running = False
     return selected, DIFFICULTIES[selected]
 
 
-def save_game_result(difficulty, result, duration):
-    conn = sqlite3.connect("minesweeper_stats.db")
-    cursor = conn.cursor()
-
-    now = datetime.datetime.now().isoformat()
-    cursor.execute('''
-                   INSERT INTO game_stats (date, difficulty, result, duration)
-                   VALUES (?, ?, ?, ?)
-                   ''', (now, difficulty, result, duration))
-
-    conn.commit()
-    conn.close()
+def solver_for(solver, game):
+    # Решатель живёт столько же, сколько партия, и следит за её изменениями
+    if solver is None or solver.game is not game:
+        return MinesweeperSolver.for_game(game)
+    return solver
 
-import threading
 
-def show_statistics_window():
-    def run_stats_window():
-        stats_window = tk.Tk()  # Было Toplevel(), но Toplevel требует уже активного Tk
-        stats_window.title("🏆 Статистика лучших результатов")
-        stats_window.geometry("500x500")
+def make_camera(cols, rows):
+    return Camera(cols, rows, min(cols * CELL_SIZE, MAX_VIEW_WIDTH), min(rows * CELL_SIZE, MAX_VIEW_HEIGHT))
 
-        conn = sqlite3.connect("minesweeper_stats.db")
 
-        difficulties = ['Легко', 'Средне', 'Сложно']
-        titles = {'Легко': 'Легкий', 'Средне': 'Средний', 'Сложно': 'Сложный'}
-
-        for i, difficulty in enumerate(difficulties):
-            label = tk.Label(stats_window, text=f"🏅 {titles[difficulty]}", font=("Arial", 12, "bold"))
-            label.pack(pady=(10 if i == 0 else 5, 0))
-
-            df = pd.read_sql_query(f'''
-                SELECT date, duration FROM game_stats
-                WHERE result = "win" AND difficulty = ?
-                ORDER BY duration ASC
-                LIMIT 5
-            ''', conn, params=(difficulty,))
-
-
-
-            tree = ttk.Treeview(stats_window, columns=("date", "duration"), show="headings", height=5)
-            tree.heading("date", text="Дата")
-            tree.heading("duration", text="Время (сек)")
-
-            if df.empty:
-                print(f"Нет данных для сложности {difficulty}")
-            else:
-                for _, row in df.iterrows():
-                    tree.insert("", "end", values=(row["date"], round(row["duration"], 2)))
-
-            tree.pack(pady=5)
-
-        conn.close()
-        stats_window.mainloop()  # ОБЯЗАТЕЛЬНО!
-
-
-    # Запускаем окно статистики в отдельном потоке, чтобы не блокировать pygame
-    threading.Thread(target=run_stats_window, daemon=True).start()
-
-
-
-
-def main():
+def main(custom_board=None):
     pygame.init()
     font = pygame.font.SysFont(None, 30)
     big_font = pygame.font.SysFont(None, 50)
-
-    # Начальный выбор сложности
-    screen = pygame.display.set_mode((400, 300))
-    difficulty_str, (cols, rows, bombs) = difficulty_menu(screen, font)
-
-    width = cols * CELL_SIZE
+    profile_font = pygame.font.SysFont(None, 20)
+    pygame.key.set_repeat(200, 30)
+    assets = UIAssets(font)
+
+    if custom_board is not None:
+        # Поле произвольного размера, например из командной строки
+        cols, rows, bombs = custom_board
+        difficulty_str = f'{cols}x{rows}/{bombs}'
+    else:
+        # Начальный выбор сложности
+        screen = pygame.display.set_mode((400, 300))
+        difficulty_str, (cols, rows, bombs) = difficulty_menu(screen, font)
+
+    camera = make_camera(cols, rows)
+    width = camera.view_width
     difficulty_button_height = 50
-    height = rows * CELL_SIZE + UI_PANEL_HEIGHT + difficulty_button_height + 50
+    height = camera.view_height + UI_PANEL_HEIGHT + difficulty_button_height + 50
     screen = pygame.display.set_mode((width, height))
     pygame.display.set_caption('Сапёр')
 
     # Загрузка основных иконок клеток
-    image_names = ['bomb', 'bombed', 'closed', 'flagged', 'noBomb', 'opened'] + [f'num{i}' for i in range(9)]
-
-    images = {}
-    for name in image_names:
-        path = f'res/images/{name}.png'
-        try:
-            images[name] = pygame.image.load(path).convert_alpha()
-            images[name] = pygame.transform.scale(images[name], (CELL_SIZE, CELL_SIZE))
-        except Exception as e:
-            print(f"[ERROR] Failed to load {path}: {e}")
+    images = load_cell_images()
 
     # Загрузка изображений кнопки reset
     reset_imgs = {}
@@ -414,102 +250,137 @@ def main():
             reset_imgs[state_name] = pygame.Surface((40, 40))  # Заглушка
 
     game = Game(cols, rows, bombs, difficulty_str)
+    renderer = BoardRenderer(images, cols, rows, camera)
+    solver = None
     clock = pygame.time.Clock()
 
+    # Экран перерисовывается по частям: поле - по изменённым клеткам,
+    # панель - когда меняются счётчик/таймер/состояние, кнопки - только целиком
+    full_redraw = True
+    ui_state = None
+    reset_rect = pygame.Rect(0, 0, 0, 0)
+    overlay_rect = None
+    replay_saved = None
+
     running = True
     while running:
-        screen.fill(GRAY)
-
+        profiler.frame_start()
         timer = 0
         if game.start_time is not None and game.state == 'playing':
             timer = time.time() - game.start_time
         elif game.state in ('win', 'lose'):
             timer = game.elapsed_time
 
-        # Отрисовка игрового поля
-        draw_board(screen, game, images)
+        dirty_rects = []
+        if full_redraw:
+            screen.fill(GRAY)
+            renderer.invalidate()
+            button_rect, stats_rect, solve_rect = draw_buttons(screen, font, camera.view_height, assets)
+            ui_state = None
+            dirty_rects.append(screen.get_rect())
+            full_redraw = False
+
+        # Отрисовка игрового поля (только изменившиеся клетки)
+        with profiler.timer('draw_board'):
+            dirty_rects += renderer.render(screen, game)
 
         # Отрисовка UI (счётчик бомб, кнопка reset, таймер)
-        reset_rect = draw_ui(screen, font, game.flags, bombs, timer, width, height, reset_imgs, game.state, game.rows)
-
-        # Кнопка "Сложность"
-        difficulty_button_x = 10
-        difficulty_button_y = rows * CELL_SIZE + UI_PANEL_HEIGHT  # сразу под UI-панелью
-
-        button_text = "Сложность"
-        button_padding_x = 10
-        button_padding_y = 5
-        btn_surf = font.render(button_text, True, WHITE)
-        btn_rect = btn_surf.get_rect()
-        btn_rect.topleft = (difficulty_button_x + button_padding_x, difficulty_button_y + button_padding_y)
-        button_rect = pygame.Rect(difficulty_button_x,
-                                  difficulty_button_y,
-                                  btn_rect.width + 2 * button_padding_x,
-                                  btn_rect.height + 2 * button_padding_y)
-        pygame.draw.rect(screen, BLUE, button_rect, border_radius=5)
-        screen.blit(btn_surf, btn_rect)
-
-        # Кнопка "Статистика"
-        stats_text = "Stats"
-        stats_surf = font.render(stats_text, True, WHITE)
-        stats_rect = stats_surf.get_rect()
-
-        # Позиционируем кнопку от правого края
-        button_padding_x = 10  # тот же padding
-        button_padding_y = 5
-        stats_button_width = stats_rect.width + 2 * button_padding_x
-        stats_button_height = stats_rect.height + 2 * button_padding_y
-        stats_button_x = screen.get_width() - stats_button_width - 10  # 10 px отступ от правого края
-        stats_button_y = difficulty_button_y  # на том же уровне
-
-        stats_rect.topleft = (stats_button_x + button_padding_x, stats_button_y + button_padding_y)
-        stats_button_rect = pygame.Rect(stats_button_x,
-                                        stats_button_y,
-                                        stats_button_width,
-                                        stats_button_height)
-        pygame.draw.rect(screen, BLUE, stats_button_rect, border_radius=5)
-        screen.blit(stats_surf, stats_rect)
-
-        # ---- Добавляем кнопку "Решить" ----
-
-        solve_text = "Solve"
-        solve_surf = font.render(solve_text, True, WHITE)
-        solve_rect = solve_surf.get_rect()
-
-        solve_button_width = solve_rect.width + 2 * button_padding_x
-        solve_button_height = solve_rect.height + 2 * button_padding_y
-
-        # Располагаем под кнопкой "Статистика" с отступом 10 пикселей по вертикали
-        solve_button_x = stats_button_x
-        solve_button_y = stats_button_y + stats_button_height + 10
-
-        solve_rect.topleft = (solve_button_x + button_padding_x, solve_button_y + button_padding_y)
-        solve_button_rect = pygame.Rect(solve_button_x, solve_button_y, solve_button_width, solve_button_height)
-
-        pygame.draw.rect(screen, BLUE, solve_button_rect, border_radius=5)
-        screen.blit(solve_surf, solve_rect)
+        new_ui_state = (game.flags, int(timer), game.state)
+        if new_ui_state != ui_state:
+            ui_state = new_ui_state
+            started = profiler.start()
+            panel_rect = pygame.Rect(0, camera.view_height, width, UI_PANEL_HEIGHT)
+            screen.fill(GRAY, panel_rect)
+            reset_rect = draw_ui(screen, font, game.flags, bombs, timer, width, height, reset_imgs, game.state,
+                                 game.rows, board_height=camera.view_height, assets=assets)
+            dirty_rects.append(panel_rect)
+            profiler.stop('draw_ui', started)
+
+        # Запись законченной партии дописывается в архив один раз
+        if game.state in ('win', 'lose') and game is not replay_saved:
+            replay_saved = game
+            append_replays(REPLAY_PATH, game.replay_bytes())
+
+        # Если игра окончена - выводим сообщение поверх всего, что перерисовали
+        if dirty_rects and game.state in ('win', 'lose'):
+            if game.state == 'win':
+                message_rect = draw_message(screen, big_font, "ПОБЕДА!", width, height, win=True, assets=assets)
+            else:
+                message_rect = draw_message(screen, big_font, "ПРОИГРЫШ!", width, height, win=False,
+                                            assets=assets)
+            dirty_rects.append(message_rect)
+
+        if profiler.enabled:
+            overlay_rect = draw_profile_overlay(screen, profile_font, overlay_rect)
+            dirty_rects.append(overlay_rect)
 
+        if dirty_rects:
+            with profiler.timer('display_update'):
+                pygame.display.update(dirty_rects)
+
+        started = profiler.start()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                full_redraw = True
+
+            # Камера: стрелки и средняя кнопка мыши - прокрутка, колесо и +/- - зум
+            if event.type == pygame.KEYDOWN:
+                step = camera.cell_size
+                if event.key == pygame.K_LEFT:
+                    camera.pan(-step, 0)
+                elif event.key == pygame.K_RIGHT:
+                    camera.pan(step, 0)
+                elif event.key == pygame.K_UP:
+                    camera.pan(0, -step)
+                elif event.key == pygame.K_DOWN:
+                    camera.pan(0, step)
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    camera.zoom(1)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    camera.zoom(-1)
+                elif event.key == pygame.K_F3:
+                    # Профайлер и его оверлей; при выключении стираем оверлей с поля
+                    if not profiler.toggle():
+                        overlay_rect = None
+                        full_redraw = True
+                elif event.key == pygame.K_a and game.first_click_done:
+                    # Автоигра: решатель ходит, пока есть однозначные ходы
+                    solver = solver_for(solver, game)
+                    with profiler.timer('solver'):
+                        report = solver.auto_solve()
+                    print(f"[AUTO] {len(report['steps'])} steps, {report['resolved']} cells, "
+                          f"{report['solve_time'] * 1000:.1f} ms in solver, state: {report['state']}")
+
+            if event.type == pygame.MOUSEWHEEL:
+                mx, my = pygame.mouse.get_pos()
+                if my < camera.view_height:
+                    camera.zoom(event.y, anchor=(mx, my))
+
+            if event.type == pygame.MOUSEMOTION and event.buttons[1]:
+                camera.pan(-event.rel[0], -event.rel[1])
+
             if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
                 mx, my = event.pos
 
                 if reset_rect.collidepoint(mx, my):
-                    button_sound.play()
+                    audio.play('button')
                     game = Game(cols, rows, bombs, difficulty_str)
+                    full_redraw = True
                     continue
 
                 if stats_rect.collidepoint(mx, my):
-                    button_sound.play()
+                    audio.play('button')
                     show_statistics_window()
                     continue
 
                 if solve_rect.collidepoint(mx, my):
-                    button_sound.play()
-                    solver = MinesweeperSolver(game.board.visible_board, game.board.hidden_board)
-                    actions = solver.solve_step()
+                    audio.play('button')
+                    solver = solver_for(solver, game)
+                    with profiler.timer('solver'):
+                        actions = solver.solve_step()
 
                     for action, x, y in actions:
 
@@ -520,33 +391,43 @@ def main():
                     continue
 
                 if button_rect.collidepoint(mx, my):
-                    button_sound.play()  # 🔈 Воспроизведение звука при нажатии на "Сложность"
+                    audio.play('button')  # 🔈 Воспроизведение звука при нажатии на "Сложность"
                     # Открываем меню выбора сложности и обновляем игру и окно
                     difficulty_str, (cols, rows, bombs) = difficulty_menu(screen, font)
-                    width = cols * CELL_SIZE
-                    height = rows * CELL_SIZE + UI_PANEL_HEIGHT + difficulty_button_height + 50
+                    camera = make_camera(cols, rows)
+                    width = camera.view_width
+                    height = camera.view_height + UI_PANEL_HEIGHT + difficulty_button_height + 50
                     screen = pygame.display.set_mode((width, height))
                     game = Game(cols, rows, bombs, difficulty_str)
+                    renderer = BoardRenderer(images, cols, rows, camera)
+                    full_redraw = True
                     continue
 
-                if my < rows * CELL_SIZE:
-                    cell_x = mx // CELL_SIZE
-                    cell_y = my // CELL_SIZE
+                cell = camera.screen_to_cell(mx, my)
+                if cell is not None:
+                    cell_x, cell_y = cell
                     if event.button == 1:
                         game.on_left_click(cell_x, cell_y)
                     elif event.button == 3:
                         game.on_right_click(cell_x, cell_y)
 
-        # Если игра окончена - выводим сообщение
-        if game.state == 'win':
-            draw_message(screen, big_font, "ПОБЕДА!", width, height, win=True)
-        elif game.state == 'lose':
-            draw_message(screen, big_font, "ПРОИГРЫШ!", width, height, win=False)
+        profiler.stop('events', started)
 
-        pygame.display.flip()
+        # Окно статистики живёт в этом же потоке - даём ему обработать события
+        with profiler.timer('stats_window'):
+            pump_statistics_window()
+        profiler.frame_end()
         clock.tick(30)
 
+    close_statistics_window()
+    if profiler.histograms:
+        profiler.export()
+        print(f"[LOG] Profile saved to {PROFILE_PATH}")
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # python MineSweeper.py [cols rows bombs] - поле произвольного размера
+    if len(sys.argv) == 4:
+        main(tuple(int(arg) for arg in sys.argv[1:]))
+    else:
+        main()
\ No newline at end of file
@@ -1,10 +1,30 @@
+import itertools
+import json
+import math
+import os
+import random
+import sqlite3
+import subprocess
+import tempfile
+import sys
 import time
 import unittest
 import pygame
 from unittest.mock import patch, MagicMock
 import threading
 import traceback
+import analytics
+import profiler
+import benchmark
+import replay
+import snapshot
+import db
+import stats
 from solver import MinesweeperSolver
+from compact_board import CompactBoard
+from renderer import BoardRenderer, Camera, CELL_SIZE
+from ui_assets import UIAssets
+from simulate import simulate
 
 from MineSweeper import (
     draw_board,
@@ -43,6 +63,48 @@ class TestMinesweeperLogic(unittest.TestCase):
         for bx, by in board.bombs:
             self.assertFalse(abs(bx - first_x) <= 1 and abs(by - first_y) <= 1)
 
+    def test_place_bombs_counts_match_bombs(self):
+        board = Board(12, 10, 30)
+        board.place_bombs(0, 0)
+        self.assertEqual(len(set(board.bombs)), 30)
+        for y in range(board.rows):
+            for x in range(board.cols):
+                if (x, y) in board.bombs:
+                    self.assertEqual(board.hidden_board[y][x], -1)
+                else:
+                    self.assertEqual(board.hidden_board[y][x], board.count_bombs_around(x, y))
+
+    def test_seeded_placement_is_reproducible(self):
+        import placement
+        for cols, rows, amount in ((9, 9, 10), (30, 16, 99), (30, 16, 400)):
+            with_numpy = placement.sample_mine_indices(cols, rows, amount, 4, 4, seed=123)
+            with patch('placement._numpy', None):
+                without_numpy = placement.sample_mine_indices(cols, rows, amount, 4, 4, seed=123)
+                plain_rng = placement.sample_mine_indices(cols, rows, amount, 4, 4, rng=random.Random(5))
+            self.assertEqual(with_numpy, without_numpy)
+            self.assertEqual(plain_rng, placement.sample_mine_indices(cols, rows, amount, 4, 4,
+                                                                      rng=random.Random(5)))
+            self.assertEqual(len(set(with_numpy)), amount)
+            self.assertFalse(set(with_numpy) & set(placement.safe_zone(cols, rows, 4, 4)))
+
+        board = Board(16, 16, 40)
+        compact = CompactBoard(16, 16, 40)
+        board.place_bombs(3, 3, seed=8)
+        compact.place_bombs(3, 3, rng=placement.SplitMix64(8))
+        self.assertEqual(sorted(board.bombs), sorted(compact.bombs))
+
+        # Счётчиковый генератор: потоки независимы, слова пачкой совпадают с поштучными
+        rng = placement.SplitMix64(1)
+        one_by_one = [rng.getrandbits(64) for _ in range(5)]
+        self.assertEqual(placement.SplitMix64(1).words(5),
+                         b''.join(word.to_bytes(8, 'little') for word in one_by_one))
+        with patch('placement._numpy', None):
+            self.assertEqual(placement.SplitMix64(1).words(5),
+                             b''.join(word.to_bytes(8, 'little') for word in one_by_one))
+        self.assertNotEqual(placement.SplitMix64(1, stream=1).getrandbits(64), one_by_one[0])
+        rng.setstate(placement.SplitMix64(1).getstate())
+        self.assertEqual(rng.getrandbits(64), one_by_one[0])
+
     def test_count_bombs_around(self):
         board = Board(3, 3, 0)
         board.bombs = [(0, 0), (1, 1)]
@@ -68,6 +130,18 @@ class TestMinesweeperLogic(unittest.TestCase):
                 if (x, y) != (1, 1):
                     self.assertEqual(game.board.visible_board[y][x], CELL_STATES.index('opened'))
 
+    def test_reveal_large_empty_region_without_recursion(self):
+        game = Game(300, 300, 0, 'Легко')
+        game.board.init_hidden_board()
+
+        with patch('audio.play') as play:
+            changed = game.reveal(0, 0)
+
+        self.assertEqual(len(changed), 300 * 300)
+        self.assertEqual(game.closed_cells, 0)
+        self.assertEqual([c.args[0] for c in play.call_args_list], ['click', 'win'])
+        self.assertEqual(game.state, 'win')
+
     def test_win_condition(self):
         game = Game(2, 2, 1, 'Легко')
 
@@ -156,6 +230,56 @@ class TestMinesweeperLogic(unittest.TestCase):
         # После открытия всех безопасных клеток игра должна закончиться победой
         self.assertEqual(game.state, 'win')
 
+    def test_stats_export_streams_without_pandas(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = db.connect(os.path.join(tmp, 'stats.db'))
+            with conn:
+                conn.executemany("INSERT INTO game_stats (date, difficulty, result, duration) VALUES (?, ?, ?, ?)",
+                                 [('d', 'Легко', 'win', 1.5), ('d', 'Сложно', 'lose', 2.0)])
+            self.assertEqual(list(db.iter_results(conn, 'Сложно', batch=1)), [(2, 'd', 'Сложно', 'lose', 2.0)])
+
+            path = os.path.join(tmp, 'out.csv')
+            with patch.dict(sys.modules, {'pandas': None}):
+                stats.export_csv(path, conn)
+                with self.assertRaises(ImportError):
+                    stats.results_dataframe(conn)
+            conn.close()
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read().splitlines(), ['id,date,difficulty,result,duration',
+                                                         '1,d,Легко,win,1.5', '2,d,Сложно,lose,2.0'])
+
+    def test_game_import_has_no_gui_or_audio_side_effects(self):
+        code = ("import sys, game; "
+                "print(sorted(m for m in ('pygame', 'tkinter', 'pandas') if m in sys.modules))")
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def test_compact_board_matches_board(self):
+        board = Board(4, 3, 2)
+        compact = CompactBoard(4, 3, 2)
+        board.bombs = [(0, 0), (3, 2)]
+        compact.bombs = [(0, 0), (3, 2)]
+        board.init_hidden_board()
+        compact.init_hidden_board()
+
+        for y in range(3):
+            for x in range(4):
+                self.assertEqual(compact.hidden_board[y][x], board.hidden_board[y][x])
+                self.assertEqual(sorted(compact.neighbors(x, y)), sorted(board.neighbors(x, y)))
+        self.assertEqual(sorted(compact.bombs), [(0, 0), (3, 2)])
+
+    def test_compact_game_reveal(self):
+        game = Game(3, 3, 1, 'Легко', compact=True)
+        game.board.bombs = [(0, 0)]
+        game.board.init_hidden_board()
+
+        game.reveal(2, 2)
+
+        self.assertEqual(game.board.visible_board[0][0], CELL_STATES.index('bombed'))
+        self.assertEqual(game.board.visible[8], CELL_STATES.index('opened'))
+        self.assertEqual(game.state, 'win')
+
     def tearDown(self):
         pygame.quit()
 
@@ -187,6 +311,35 @@ class TestMinesweeperLogic(unittest.TestCase):
         # Проверяем что blit вызвано нужное количество раз
         self.assertTrue(screen.blit.called)
 
+    def test_board_renderer_redraws_only_changed_cells(self):
+        names = ['bomb', 'bombed', 'closed', 'flagged', 'noBomb'] + [f'num{i}' for i in range(9)]
+        images = {name: pygame.Surface((CELL_SIZE, CELL_SIZE)) for name in names}
+        screen = pygame.Surface((3 * CELL_SIZE, 3 * CELL_SIZE))
+        game = Game(3, 3, 1, 'Легко')
+        game.board.bombs = [(0, 0)]
+        game.board.init_hidden_board()
+        renderer = BoardRenderer(images, 3, 3)
+
+        self.assertEqual(renderer.render(screen, game), [pygame.Rect(0, 0, 3 * CELL_SIZE, 3 * CELL_SIZE)])
+        self.assertEqual(renderer.render(screen, game), [])
+
+        game.on_right_click(2, 2)
+        self.assertEqual(renderer.render(screen, game),
+                         [pygame.Rect(2 * CELL_SIZE, 2 * CELL_SIZE, CELL_SIZE, CELL_SIZE)])
+
+    def test_camera_maps_mouse_through_pan_and_zoom(self):
+        camera = Camera(100, 100, 300, 300)
+        self.assertEqual(camera.screen_to_cell(45, 15), (1, 0))
+
+        camera.pan(CELL_SIZE * 10, CELL_SIZE * 5)
+        self.assertEqual(camera.screen_to_cell(45, 15), (11, 5))
+        self.assertEqual(camera.visible_range(), (10, 5, 20, 15))
+
+        camera.zoom(1, anchor=(0, 0))
+        self.assertEqual(camera.cell_size, 40)
+        self.assertEqual(camera.screen_to_cell(0, 0), (10, 5))
+        self.assertIsNone(camera.screen_to_cell(300, 10))
+
     def test_draw_ui_win_and_lose(self):
         screen = MagicMock()
         font = MagicMock()
@@ -212,6 +365,25 @@ class TestMinesweeperLogic(unittest.TestCase):
         reset_rect_lose = draw_ui(screen, font, 1, 10, 5.0, width, height, reset_imgs, 'lose', 5)
         self.assertIsNotNone(reset_rect_lose)
 
+    def test_ui_assets_render_only_on_change(self):
+        font = MagicMock()
+        font.render.side_effect = lambda text, aa, color: pygame.Surface((10 * len(text), 20))
+        assets = UIAssets(font)
+        reset_imgs = {'base': pygame.Surface((50, 50)), 'win': pygame.Surface((50, 50)),
+                      'lose': pygame.Surface((50, 50))}
+        screen = pygame.Surface((300, 300))
+
+        for _ in range(3):
+            draw_ui(screen, font, 1, 10, 5.2, 300, 300, reset_imgs, 'playing', 5, assets=assets)
+        self.assertEqual(font.render.call_count, 2)
+
+        draw_ui(screen, font, 1, 10, 6.0, 300, 300, reset_imgs, 'playing', 5, assets=assets)
+        self.assertEqual(font.render.call_count, 3)
+
+        message = assets.message(font, "Victory", (0, 0, 0), (0, 0, 0))
+        self.assertIs(assets.message(font, "Victory", (0, 0, 0), (0, 0, 0)), message)
+        self.assertEqual(message.get_size(), (72, 22))
+
     def test_draw_message_win_and_loss(self):
         screen = MagicMock()
         font = MagicMock()
@@ -243,6 +415,45 @@ class TestMinesweeperLogic(unittest.TestCase):
         show_statistics_window()
         self.assertTrue(mock_thread.called)
 
+    def test_stats_window_is_reused_and_refreshes_on_new_results(self):
+        loads = []
+        writer = db.ResultWriter()
+        window = stats.StatsWindow(loader=lambda: loads.append(1) or {'Легко': [('d', 1.0)]}, writer=writer)
+        filled = []
+        with patch.object(stats.StatsWindow, '_build', lambda self: setattr(self, 'root', MagicMock())), \
+                patch.object(stats.StatsWindow, '_fill', lambda self, data: filled.append(data)):
+            window.show()
+            root = window.root
+            for _ in range(100):
+                window.pump()
+                if filled:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(filled, [{'Легко': [('d', 1.0)]}])
+
+            # Повторное открытие - то же окно; без новых результатов данные не перечитываются
+            window.hide()
+            window.show()
+            self.assertIs(window.root, root)
+            for _ in range(100):
+                window.pump()
+                if not window.loading:
+                    break
+                time.sleep(0.01)
+            loads_before = len(loads)
+            window.pump()
+            self.assertEqual(len(loads), loads_before)
+
+            # Писатель сохранил пачку - окно перечитывает данные само
+            writer.version += 1
+            for _ in range(100):
+                window.pump()
+                if len(loads) > loads_before and not window.loading:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(len(loads), loads_before + 1)
+            self.assertTrue(root.update.called)
+
     @patch('pygame.display.set_mode')
     @patch('pygame.font.SysFont')
     @patch('pygame.image.load')
@@ -414,6 +625,234 @@ class TestMinesweeperLogic(unittest.TestCase):
         thread.join(timeout=2)
 
 
+    def test_simulate_is_reproducible_and_headless(self):
+        with patch('game.save_game_result') as save:
+            first = simulate(5, 'Легко', seed=7)
+            second = simulate(5, 'Легко', seed=7)
+
+        self.assertFalse(save.called)
+        self.assertEqual(first['games'], 5)
+        for key in ('wins', 'win_rate', 'avg_guesses', 'avg_solver_steps'):
+            self.assertEqual(first[key], second[key])
+
+    @patch('simulate.CHUNK_SIZE', 2)
+    def test_simulate_parallel_matches_sequential(self):
+        sequential = simulate(6, 'Легко', seed=11)
+        parallel = simulate(6, 'Легко', seed=11, workers=2)
+
+        self.assertEqual(parallel['games'], 6)
+        for key in ('wins', 'avg_guesses'):
+            self.assertEqual(sequential[key], parallel[key])
+
+    def test_result_writer_batches_in_background(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'stats.db')
+            writer = db.ResultWriter(path)
+            for i in range(50):
+                writer.save(('2024-01-01', 'Легко', 'win', float(i)))
+            writer.flush()
+            conn = db.connect(path)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM game_stats").fetchone()[0], 50)
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+            writer.save(('2024-01-02', 'Сложно', 'lose', 1.0))
+            writer.close()
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM game_stats").fetchone()[0], 51)
+            conn.close()
+
+    def test_db_migrations_and_best_times(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'stats.db')
+            # База старого формата: только game_stats, user_version = 0
+            conn = sqlite3.connect(path)
+            conn.executescript(db.MIGRATIONS[0])
+            conn.executemany("INSERT INTO game_stats (date, difficulty, result, duration) VALUES (?, ?, ?, ?)",
+                             [('d', 'Легко', 'win', 30.0), ('d', 'Легко', 'lose', 5.0), ('d', 'Легко', 'win', 20.0)])
+            conn.commit()
+            conn.close()
+
+            conn = db.connect(path)
+            self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], len(db.MIGRATIONS))
+            self.assertEqual(db.difficulty_summary(conn, 'Легко'), (3, 2, 20.0))
+            self.assertEqual(db.best_times(conn, 'Легко'), [('d', 20.0), ('d', 30.0)])
+
+            # Дальше сводку и лучшие времена ведут триггеры
+            rows = [('e', 'Легко', 'win', float(t)) for t in range(1, db.BEST_TIMES_KEPT + 5)]
+            with conn:
+                conn.executemany("INSERT INTO game_stats (date, difficulty, result, duration) VALUES (?, ?, ?, ?)",
+                                 rows)
+            self.assertEqual(db.difficulty_summary(conn, 'Легко'), (3 + len(rows), 2 + len(rows), 1.0))
+            self.assertEqual(db.best_times(conn, 'Легко', 3), [('e', 1.0), ('e', 2.0), ('e', 3.0)])
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM best_times").fetchone()[0], db.BEST_TIMES_KEPT)
+            self.assertEqual(db.difficulty_summary(conn, 'Сложно'), (0, 0, None))
+            conn.close()
+
+    def test_analytics_aggregates_match_raw_rows(self):
+        rng = random.Random(8)
+        rows = [(f'2024-01-{rng.randint(1, 3):02d}T12:00:00', 'Средне', rng.choice(['win', 'lose']),
+                 rng.choice([rng.uniform(0, 10), rng.uniform(10, 2000)])) for _ in range(300)]
+        with tempfile.TemporaryDirectory() as tmp:
+            # Половина строк - до миграции (заполнение), половина - через триггеры
+            path = os.path.join(tmp, 'stats.db')
+            conn = sqlite3.connect(path)
+            conn.executescript(db.MIGRATIONS[0])
+            insert = "INSERT INTO game_stats (date, difficulty, result, duration) VALUES (?, ?, ?, ?)"
+            conn.executemany(insert, rows[:150])
+            conn.commit()
+            conn.close()
+            conn = db.connect(path)
+            with conn:
+                conn.executemany(insert, rows[150:])
+            report = analytics.difficulty_report(conn, 'Средне')
+            conn.close()
+
+        results = [result for _, _, result, _ in rows]
+        self.assertEqual((report['games'], report['wins']), (300, results.count('win')))
+        wins = sorted(duration for _, _, result, duration in rows if result == 'win')
+        for key, q in (('median', 0.5), ('p90', 0.9), ('p99', 0.99)):
+            exact = wins[math.ceil(q * len(wins)) - 1]
+            self.assertLessEqual(abs(report[key] - exact), exact * 0.1 + 0.1)
+
+        runs = [len(list(group)) for result, group in itertools.groupby(results) if result == 'win']
+        self.assertEqual(report['best_win_streak'], max(runs))
+        last = list(next(itertools.groupby(reversed(results)))[1])
+        self.assertEqual(report['current_streak'], (last[0], len(last)))
+
+        days = {}
+        for date, _, result, _ in rows:
+            games, won = days.get(date[:10], (0, 0))
+            days[date[:10]] = (games + 1, won + (result == 'win'))
+        self.assertEqual([(day, games, won) for day, games, won, _ in report['trend']],
+                         [(day, *days[day]) for day in sorted(days)])
+
+    def test_stats_cache_reads_disk_only_after_new_results(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'stats.db')
+            cache = db.QueryCache()
+            writer = db.ResultWriter(path, cache)
+            writer.save(('2024-01-01', 'Легко', 'win', 3.0))
+            writer.flush()
+
+            with patch('db.connect', wraps=db.connect) as connect:
+                first = stats.load_statistics(path, cache)
+                self.assertEqual(connect.call_count, 1)
+                self.assertEqual(stats.load_statistics(path, cache), first)
+                self.assertEqual(connect.call_count, 1)
+
+                writer.save(('2024-01-01', 'Легко', 'win', 2.0))
+                writer.flush()
+                updated = stats.load_statistics(path, cache)
+                self.assertEqual(connect.call_count, 2)
+            writer.close()
+
+        self.assertEqual(first['Легко'][0], [('2024-01-01', 3.0)])
+        self.assertEqual(updated['Легко'][0], [('2024-01-01', 2.0), ('2024-01-01', 3.0)])
+        self.assertEqual(updated['Сложно'], first['Сложно'])
+
+        small = db.QueryCache(maxsize=2)
+        for difficulty in ('a', 'b', 'c'):
+            small.get('p', 'kind', difficulty, lambda: difficulty)
+        self.assertEqual(list(small.entries), [('p', 'kind', 'b'), ('p', 'kind', 'c')])
+
+    def test_benchmark_report_and_compare(self):
+        report = benchmark.run_benchmarks({'tiny': (9, 9, 10)}, repeat=1)
+        self.assertEqual(sorted(report['results']), sorted(f'{case}/tiny' for case in benchmark.CASES))
+        json.dumps(report)
+
+        slower = {'results': {name: dict(result, median=result['median'] * 2 + 1)
+                              for name, result in report['results'].items()}}
+        rows, regressions = benchmark.compare(report, slower)
+        self.assertEqual(len(rows), len(benchmark.CASES))
+        self.assertEqual(regressions, rows)
+        self.assertEqual(benchmark.compare(report, report)[1], [])
+
+    def test_profiler_records_only_when_enabled(self):
+        prof = profiler.Profiler()
+        with prof.timer('draw_board'):
+            pass
+        prof.stop('events', prof.start())
+        prof.count('cells')
+        self.assertEqual((prof.histograms, prof.counters), ({}, {}))
+
+        prof.enable()
+        for _ in range(10):
+            prof.frame_start()
+            with prof.timer('draw_board'):
+                time.sleep(0.001)
+            prof.count('cells', 2)
+            prof.frame_end()
+        self.assertEqual(sum(prof.histograms['frame'].values()), 10)
+        self.assertGreaterEqual(prof.percentiles('draw_board')[0.5], 0.001)
+        self.assertEqual(prof.counters, {'cells': 20})
+        self.assertTrue(prof.summary_lines()[0].startswith('frame'))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'profile.json')
+            prof.export(path)
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        self.assertEqual(sum(data['phases']['draw_board']['histogram_us'].values()), 10)
+
+    def test_replay_roundtrip_reproduces_games(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'replays.bin')
+            with patch('game.save_game_result'):
+                report = simulate(4, 'Легко', seed=3, replay_path=path)
+
+                game = Game(9, 9, 10, 'Легко', seed=42)
+                game.on_left_click(4, 4)
+                game.on_right_click(0, 0)
+                game.on_right_click(0, 0)
+                MinesweeperSolver.for_game(game).auto_solve()
+                replay.append_replays(path, game.replay_bytes())
+
+                records = list(replay.iter_replays(open(path, 'rb').read()))
+                self.assertEqual(len(records), report['games'] + 1)
+                self.assertEqual(sum(r.result == 'win' for r in records[:4]), report['wins'])
+
+                last = records[-1]
+                self.assertEqual((last.cols, last.rows, last.bombs, last.seed), (9, 9, 10, 42))
+                self.assertEqual(last.first_click, (4, 4))
+                replayed = replay.play(last)
+                self.assertEqual(replayed.state, game.state)
+                self.assertEqual([list(r) for r in replayed.board.visible_board],
+                                 [list(r) for r in game.board.visible_board])
+
+                with replay.ReplayArchive(path) as archive:
+                    for record in archive:
+                        self.assertEqual(replay.play(record).state, record.result)
+
+    def test_snapshot_restores_position(self):
+        for compact in (False, True):
+            game = Game(16, 16, 40, 'Средне', compact=compact, seed=9, save_results=False)
+            game.on_left_click(8, 8)
+            game.on_right_click(0, 0)
+            MinesweeperSolver.for_game(game).auto_solve()
+            data = game.snapshot()
+
+            restored = Game.restore(data, compact=compact, save_results=False)
+            for attr in ('state', 'flags', 'closed_cells', 'first_click_done', 'difficulty', 'seed'):
+                self.assertEqual(getattr(restored, attr), getattr(game, attr))
+            self.assertEqual([list(row) for row in restored.board.visible_board],
+                             [list(row) for row in game.board.visible_board])
+            self.assertEqual([list(row) for row in restored.board.hidden_board],
+                             [list(row) for row in game.board.hidden_board])
+            self.assertEqual(sorted(restored.board.bombs), sorted(game.board.bombs))
+            self.assertEqual(restored.snapshot()[snapshot.HEADER.size:], data[snapshot.HEADER.size:])
+
+            # Без numpy формат тот же
+            with patch('placement._numpy', None):
+                self.assertEqual(game.snapshot()[snapshot.HEADER.size:], data[snapshot.HEADER.size:])
+                plain = Game.restore(data, compact=compact, save_results=False)
+            self.assertEqual([list(row) for row in plain.board.visible_board],
+                             [list(row) for row in game.board.visible_board])
+
+        fresh = Game(9, 9, 10, 'Легко', seed=4, save_results=False)
+        restored = Game.restore(fresh.snapshot(), save_results=False)
+        restored.on_left_click(4, 4)
+        fresh.on_left_click(4, 4)
+        self.assertEqual(restored.board.bombs, fresh.board.bombs)
+        self.assertIsNotNone(restored.replay_bytes())
+
     #Test solver
     def test_no_opened_cells(self):
         visible = [
@@ -430,6 +869,91 @@ class TestMinesweeperLogic(unittest.TestCase):
 
 
 
+    def test_attached_solver_matches_full_rescan(self):
+        game = Game(16, 16, 40, 'Средне', rng=random.Random(3), save_results=False)
+        game.on_left_click(8, 8)
+        solver = MinesweeperSolver.for_game(game)
+        rng = random.Random(4)
+
+        while game.state == 'playing':
+            actions = solver.solve_step()
+            fresh = MinesweeperSolver(game.board.visible_board, game.board.hidden_board).solve_step()
+            self.assertEqual(actions, fresh)
+            # Индекс "закрытая клетка -> ограничения" совпадает с самими ограничениями
+            index = {}
+            for cell, (closed, _) in solver.constraints.items():
+                for closed_cell in closed:
+                    index.setdefault(closed_cell, set()).add(cell)
+            self.assertEqual(solver.cell_constraints, index)
+            if not actions:
+                closed = [(x, y) for y in range(16) for x in range(16)
+                          if game.board.visible_board[y][x] == CELL_STATES.index('closed')]
+                game.on_left_click(*rng.choice(closed))
+            for action, x, y in actions:
+                if action == 'open':
+                    game.on_left_click(x, y)
+                else:
+                    game.on_right_click(x, y)
+
+    def test_probabilities_match_brute_force(self):
+        closed_state = CELL_STATES.index('closed')
+        opened_state = CELL_STATES.index('opened')
+        for seed in range(10):
+            rng = random.Random(seed)
+            game = Game(6, 5, 7, 'Легко', rng=rng, save_results=False)
+            game.on_left_click(rng.randrange(6), rng.randrange(5))
+            if game.state != 'playing':
+                continue
+            probs, interior_prob = MinesweeperSolver.for_game(game).probabilities()
+
+            visible, hidden = game.board.visible_board, game.board.hidden_board
+            cells = [(x, y) for y in range(5) for x in range(6)]
+            closed = [c for c in cells if visible[c[1]][c[0]] == closed_state]
+            opened = [c for c in cells if visible[c[1]][c[0]] == opened_state]
+            hits = dict.fromkeys(closed, 0)
+            total = 0
+            for mines in itertools.combinations(closed, 7):
+                mines = set(mines)
+                if all(sum((nx, ny) in mines for nx in range(x - 1, x + 2) for ny in range(y - 1, y + 2))
+                       == hidden[y][x] for x, y in opened):
+                    total += 1
+                    for cell in mines:
+                        hits[cell] += 1
+            for cell in closed:
+                self.assertAlmostEqual(probs.get(cell, interior_prob), hits[cell] / total)
+
+    def test_probability_strategy(self):
+        first = simulate(20, 'Средне', seed=5, strategy='probability')
+        second = simulate(20, 'Средне', seed=5, strategy='probability')
+        self.assertEqual(first['games'], 20)
+        self.assertEqual((first['wins'], first['avg_guesses']), (second['wins'], second['avg_guesses']))
+
+    def test_solver_propagates_to_fixpoint(self):
+        # 1-2-1 над тремя закрытыми клетками: подмножества дают мины по краям,
+        # а то, что средняя клетка безопасна, выводится уже из них - за тот же шаг
+        opened, closed = CELL_STATES.index('opened'), CELL_STATES.index('closed')
+        visible = [[opened, opened, opened],
+                   [closed, closed, closed]]
+        hidden = [[1, 2, 1],
+                  [-1, 2, -1]]
+        actions = MinesweeperSolver(visible, hidden).solve_step()
+        self.assertEqual(actions, [('open', 1, 1), ('flag', 0, 1), ('flag', 2, 1)])
+
+    def test_auto_solve_applies_actions_in_bulk(self):
+        game = Game(16, 16, 40, 'Средне', rng=random.Random(2), save_results=False)
+        game.on_left_click(8, 8)
+        solver = MinesweeperSolver.for_game(game)
+        with patch('audio.play') as play:
+            report = solver.auto_solve()
+
+        # Щелчков и флажков нет, звучит только конец игры
+        self.assertTrue(all(call.args[0] in ('win', 'boom') for call in play.call_args_list))
+        self.assertEqual(report['state'], game.state)
+        self.assertTrue(report['steps'])
+        self.assertEqual(report['resolved'], sum(cells for _, cells in report['steps']))
+        if game.state == 'playing':
+            self.assertEqual(solver.solve_step(), [])
+
     def test_subset_neighbors_leads_to_mine(self):
         # Тест на ситуацию с подмножествами соседних клеток для мин
         visible = [
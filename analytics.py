@@ -0,0 +1,101 @@
+import db
+
+# Аналитика по результатам: всё читается из накопительных таблиц, которые
+# ведут триггеры при каждой записи в game_stats (см. db.MIGRATIONS), поэтому
+# стоимость запросов не зависит от того, сколько партий сыграно.
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def bucket_bounds(bucket):
+    """Границы корзины гистограммы [от, до) в секундах (см. db.DURATION_BUCKET_SQL)."""
+    if bucket < 100:
+        return bucket / 10, (bucket + 1) / 10
+    if bucket < 190:
+        return bucket - 90, bucket - 89
+    if bucket < 280:
+        return (bucket - 180) * 10, (bucket - 179) * 10
+    return (bucket - 270) * 100, (bucket - 269) * 100
+
+
+def duration_percentiles(conn, difficulty, result='win', percentiles=PERCENTILES):
+    """{доля: время} по гистограмме; значение - середина корзины, None - нет партий."""
+    rows = conn.execute('''
+        SELECT bucket, games FROM duration_histogram
+        WHERE difficulty = ? AND result = ?
+        ORDER BY bucket
+    ''', (difficulty, result)).fetchall()
+    total = sum(games for _, games in rows)
+    values = dict.fromkeys(percentiles)
+    if not total:
+        return values
+    pending = sorted(percentiles)
+    seen = 0
+    for bucket, games in rows:
+        seen += games
+        while pending and seen >= pending[0] * total:
+            low, high = bucket_bounds(bucket)
+            values[pending.pop(0)] = (low + high) / 2
+    return values
+
+
+def streaks(conn, difficulty):
+    """(текущий результат, длина текущей серии, лучшая серия побед, худшая серия поражений)."""
+    row = conn.execute('''
+        SELECT current_result, current_length, best_win_streak, best_lose_streak
+        FROM streaks WHERE difficulty = ?
+    ''', (difficulty,)).fetchone()
+    return row or (None, 0, 0, 0)
+
+
+def daily_trend(conn, difficulty, days=30):
+    """Последние days дней с партиями: [(день, партий, побед, доля побед), ...]."""
+    rows = conn.execute('''
+        SELECT day, games, wins FROM daily_stats
+        WHERE difficulty = ?
+        ORDER BY day DESC
+        LIMIT ?
+    ''', (difficulty, days)).fetchall()
+    return [(day, games, wins, wins / games) for day, games, wins in reversed(rows)]
+
+
+def difficulty_report(conn, difficulty):
+    """Сводка по сложности для окна статистики."""
+    games, wins, best = db.difficulty_summary(conn, difficulty)
+    current_result, current_length, best_win_streak, best_lose_streak = streaks(conn, difficulty)
+    percentiles = duration_percentiles(conn, difficulty)
+    return {
+        'games': games,
+        'wins': wins,
+        'win_rate': wins / games if games else 0.0,
+        'best': best,
+        'median': percentiles[0.5],
+        'p90': percentiles[0.9],
+        'p99': percentiles[0.99],
+        'current_streak': (current_result, current_length),
+        'best_win_streak': best_win_streak,
+        'best_lose_streak': best_lose_streak,
+        'trend': daily_trend(conn, difficulty),
+    }
+
+
+def format_report(report):
+    """Одна-две строки для окна статистики."""
+    if not report['games']:
+        return "Партий пока нет"
+
+    def seconds(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    result, length = report['current_streak']
+    streak = f"{length} {'побед' if result == 'win' else 'поражений'} подряд"
+    lines = [
+        f"Партий: {report['games']}, побед: {report['win_rate']:.0%}, серия: {streak} "
+        f"(лучшая: {report['best_win_streak']})",
+        f"Время побед, с: медиана {seconds(report['median'])}, p90 {seconds(report['p90'])}, "
+        f"p99 {seconds(report['p99'])}",
+    ]
+    if report['trend']:
+        day, games, _, win_rate = report['trend'][-1]
+        lines.append(f"{day}: {games} партий, побед {win_rate:.0%}")
+    return "\n".join(lines)
@@ -0,0 +1,66 @@
+import os
+
+# Путь к папке со звуками
+base_path = os.path.dirname(__file__)
+sound_path = lambda name: os.path.join(base_path, 'res/sounds', name)
+
+SOUND_FILES = {
+    'click': 'click.wav',
+    'win': 'win.wav',
+    'boom': 'lose.wav',
+    'button': 'button.wav',
+    'flag': 'flag.wav',
+}
+
+
+class NullAudio:
+    """Беззвучный backend для тестов и безголовых симуляций."""
+
+    def play(self, name):
+        pass
+
+
+class PygameAudio:
+    """Звуки через pygame.mixer.
+
+    pygame импортируется, микшер инициализируется и файл загружается
+    только при первом проигрывании конкретного звука. Если звук не
+    загрузился (нет устройства или файла), он просто не играет.
+    """
+
+    def __init__(self):
+        self.sounds = {}
+
+    def load(self, name):
+        path = sound_path(SOUND_FILES[name])
+        try:
+            import pygame
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            return pygame.mixer.Sound(path)
+        except Exception as e:
+            print(f"[ERROR] Failed to load sound {path}: {e}")
+            return None
+
+    def play(self, name):
+        if name not in self.sounds:
+            self.sounds[name] = self.load(name)
+        sound = self.sounds[name]
+        if sound is not None:
+            sound.play()
+
+
+_backend = PygameAudio()
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+def get_backend():
+    return _backend
+
+
+def play(name):
+    _backend.play(name)
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+import audio
+from game import CELL_STATES, DIFFICULTIES, Game
+from placement import get_numpy
+from solver import MinesweeperSolver
+
+# Замеры горячих путей: генерация поля, открытие области, шаг решателя,
+# отрисовка поля и восстановление позиции из снимка. Результат - JSON,
+# который можно сравнить с сохранённым:
+#
+#   python benchmark.py -o baseline.json
+#   python benchmark.py --compare baseline.json
+
+# Большие поля сверх DIFFICULTIES: имя -> (cols, rows, bombs)
+LARGE_BOARDS = {
+    '200x150': (200, 150, 5000),
+    '1000x1000': (1000, 1000, 150000),
+}
+
+# Окно, в котором рисуются большие поля (всё поле 1000x1000 в пикселях
+# не поместится в память), - как MAX_VIEW_* в MineSweeper.py
+VIEW_SIZE = (1200, 720)
+
+SEED = 12345
+
+CASES = ('place_bombs', 'init_hidden_board', 'reveal', 'solve_step', 'draw_board', 'restore')
+
+
+def new_game(cols, rows, bombs, seed=SEED):
+    return Game(cols, rows, bombs, 'benchmark', seed=seed, save_results=False)
+
+
+def started_game(cols, rows, bombs, seed=SEED):
+    """Игра с расставленными минами, но без открытых клеток."""
+    game = new_game(cols, rows, bombs, seed)
+    game.board.place_bombs(cols // 2, rows // 2, game.rng)
+    game.first_click_done = True
+    return game
+
+
+def mid_game(cols, rows, bombs, seed=SEED):
+    """Фиксированная позиция середины партии: открыто около 40% безопасных клеток.
+
+    Решатель играет сам, а когда застревает - открываем случайную
+    безопасную клетку (мины известны), чтобы партия не закончилась.
+    Позиция берётся сразу после такого хода, когда решателю есть что делать.
+    """
+    game = new_game(cols, rows, bombs, seed)
+    rng = random.Random(seed)
+    game.on_left_click(cols // 2, rows // 2)
+    solver = MinesweeperSolver.for_game(game)
+    closed = CELL_STATES.index('closed')
+    target = (cols * rows - bombs) * 0.6
+    while game.state == 'playing':
+        solver.auto_solve()
+        if game.state != 'playing':
+            break
+        while True:
+            x, y = rng.randrange(cols), rng.randrange(rows)
+            if game.board.visible_board[y][x] == closed and game.board.hidden_board[y][x] != -1:
+                break
+        game.on_left_click(x, y)
+        if game.closed_cells - bombs <= target:
+            return game
+    return game
+
+
+def measure(setup, run, repeat):
+    """Время run(state) для repeat свежих state = setup(); setup не замеряется."""
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    return {'median': statistics.median(times), 'min': min(times), 'runs': repeat}
+
+
+def bench_board(cols, rows, bombs, repeat, cases=CASES):
+    """Замеры одного размера поля: {случай: {'median', 'min', 'runs'}}."""
+    results = {}
+    center = (cols // 2, rows // 2)
+    if 'place_bombs' in cases:
+        results['place_bombs'] = measure(
+            lambda: new_game(cols, rows, bombs),
+            lambda game: game.board.place_bombs(*center, game.rng), repeat)
+    if 'init_hidden_board' in cases:
+        results['init_hidden_board'] = measure(
+            lambda: started_game(cols, rows, bombs),
+            lambda game: game.board.init_hidden_board(), repeat)
+    if 'reveal' in cases:
+        # Клик в центр безопасной зоны - всегда ноль, то есть заливка
+        results['reveal'] = measure(
+            lambda: started_game(cols, rows, bombs),
+            lambda game: game.reveal(*center), repeat)
+
+    if any(case in cases for case in ('solve_step', 'draw_board', 'restore')):
+        position = mid_game(cols, rows, bombs)
+        board = position.board
+        if 'solve_step' in cases:
+            # Новый решатель каждый раз - полный проход по позиции
+            results['solve_step'] = measure(
+                lambda: MinesweeperSolver(board.visible_board, board.hidden_board, neighbors=board.neighbors),
+                lambda solver: solver.solve_step(), repeat)
+        if 'draw_board' in cases:
+            import pygame
+            from renderer import CELL_SIZE, Camera, draw_board, load_cell_images
+            images = load_cell_images(convert=False)
+            width, height = cols * CELL_SIZE, rows * CELL_SIZE
+            camera = None
+            if width > VIEW_SIZE[0] or height > VIEW_SIZE[1]:
+                width, height = min(width, VIEW_SIZE[0]), min(height, VIEW_SIZE[1])
+                camera = Camera(cols, rows, width, height)
+            surface = pygame.Surface((width, height))
+            results['draw_board'] = measure(
+                lambda: surface,
+                lambda screen: draw_board(screen, position, images, camera), repeat)
+        if 'restore' in cases:
+            # Позиция из снимка - так позиции раздаются решателю и замерам
+            snapshot = position.snapshot()
+            results['restore'] = measure(
+                lambda: snapshot,
+                lambda data: Game.restore(data, save_results=False), repeat)
+    return results
+
+
+def run_benchmarks(boards, repeat=5, cases=CASES):
+    """boards - {имя: (cols, rows, bombs)}. Возвращает {"meta": ..., "results": {"случай/имя": ...}}."""
+    previous_backend = audio.get_backend()
+    audio.set_backend(audio.NullAudio())
+    try:
+        results = {}
+        for name, (cols, rows, bombs) in boards.items():
+            for case, result in bench_board(cols, rows, bombs, repeat, cases).items():
+                results[f'{case}/{name}'] = result
+    finally:
+        audio.set_backend(previous_backend)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': get_numpy() is not None,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.2):
+    """Сравнить медианы с базовыми: [(замер, было, стало, отношение), ...] и регрессии."""
+    rows = []
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['median'] / base['median'] if base['median'] else float('inf')
+        row = (name, base['median'], result['median'], ratio)
+        rows.append(row)
+        if ratio > 1 + threshold:
+            regressions.append(row)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры горячих путей сапёра")
+    parser.add_argument('-o', '--output', help="куда записать результаты (JSON)")
+    parser.add_argument('--compare', metavar='BASELINE', help="сравнить с сохранённым JSON")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="во сколько медленнее (доля) считать регрессией, по умолчанию 0.2")
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help="без поля 1000x1000")
+    parser.add_argument('--case', action='append', choices=CASES, help="только эти замеры")
+    args = parser.parse_args()
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    boards = dict(DIFFICULTIES)
+    boards.update(LARGE_BOARDS)
+    if args.quick:
+        del boards['1000x1000']
+
+    report = run_benchmarks(boards, args.repeat, args.case or CASES)
+    for name, result in report['results'].items():
+        print(f"{name:32} {result['median'] * 1000:10.3f} мс (мин. {result['min'] * 1000:.3f})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows, regressions = compare(baseline, report, args.threshold)
+        print()
+        for name, before, after, ratio in rows:
+            mark = "  <-- регрессия" if (name, before, after, ratio) in regressions else ""
+            print(f"{name:32} {before * 1000:10.3f} -> {after * 1000:10.3f} мс  x{ratio:.2f}{mark}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
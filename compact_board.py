@@ -0,0 +1,180 @@
+from array import array
+
+from placement import get_numpy, sample_mine_indices, count_neighbor_mines, pack_mine_bits
+
+# Смещения соседей в порядке слотов таблицы
+NEIGHBOR_OFFSETS = [(-1, -1), (0, -1), (1, -1),
+                    (-1, 0), (1, 0),
+                    (-1, 1), (0, 1), (1, 1)]
+
+_neighbor_tables = {}
+
+
+def build_neighbor_table(cols, rows):
+    """Плоская таблица соседей: 8 слотов на клетку, -1 - соседа нет.
+
+    Таблица зависит только от размера поля, поэтому кешируется и
+    разделяется между всеми досками одного размера.
+    """
+    key = (cols, rows)
+    table = _neighbor_tables.get(key)
+    if table is not None:
+        return table
+
+    n = cols * rows
+    np = get_numpy()
+    if np is not None:
+        xs = np.tile(np.arange(cols, dtype=np.int32), rows)
+        ys = np.repeat(np.arange(rows, dtype=np.int32), cols)
+        slots = np.full((n, 8), -1, dtype=np.int32)
+        for k, (dx, dy) in enumerate(NEIGHBOR_OFFSETS):
+            nx = xs + dx
+            ny = ys + dy
+            valid = (nx >= 0) & (nx < cols) & (ny >= 0) & (ny < rows)
+            slots[valid, k] = (ny * cols + nx)[valid]
+        table = array('i', slots.tobytes())
+    else:
+        table = array('i', [-1]) * (n * 8)
+        for k, (dx, dy) in enumerate(NEIGHBOR_OFFSETS):
+            for y in range(rows):
+                ny = y + dy
+                if not 0 <= ny < rows:
+                    continue
+                row = [ny * cols + x + dx if 0 <= x + dx < cols else -1 for x in range(cols)]
+                start = y * cols * 8 + k
+                table[start:start + cols * 8:8] = array('i', row)
+
+    _neighbor_tables[key] = table
+    return table
+
+
+class NeighborTables:
+    """Соседи каждой клетки готовыми кортежами: индексы и координаты (x, y).
+
+    Общие для всех полей одного размера (см. neighbor_tables). Кортеж
+    клетки строится из плоской таблицы один раз - при первом обращении,
+    дальше возвращается как есть. Лениво, чтобы поле 1000x1000 не
+    держало сотни мегабайт кортежей для клеток, до которых игра не дошла.
+    """
+
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+        self.table = build_neighbor_table(cols, rows)
+        self.indices = [None] * (cols * rows)
+        self.coords = [None] * (cols * rows)
+
+    def of_index(self, i):
+        neighbors = self.indices[i]
+        if neighbors is None:
+            base = i * 8
+            neighbors = tuple(j for j in self.table[base:base + 8] if j >= 0)
+            self.indices[i] = neighbors
+        return neighbors
+
+    def of_cell(self, x, y):
+        i = y * self.cols + x
+        neighbors = self.coords[i]
+        if neighbors is None:
+            cols = self.cols
+            neighbors = tuple((j % cols, j // cols) for j in self.of_index(i))
+            self.coords[i] = neighbors
+        return neighbors
+
+
+_neighbor_caches = {}
+
+
+def neighbor_tables(cols, rows):
+    tables = _neighbor_caches.get((cols, rows))
+    if tables is None:
+        tables = NeighborTables(cols, rows)
+        _neighbor_caches[(cols, rows)] = tables
+    return tables
+
+
+class CompactBoard:
+    """Компактное поле: плоские массивы вместо списков списков.
+
+    visible - bytearray состояний клеток, hidden - array('b') чисел
+    (-1 - мина), mines - битовое множество мин. Индекс клетки: y * cols + x.
+    visible_board/hidden_board - построчные memoryview поверх тех же
+    массивов, поэтому код, обращающийся к board[y][x], работает без изменений.
+    """
+
+    def __init__(self, cols, rows, bombs_amount):
+        self.cols = cols
+        self.rows = rows
+        self.bombs_amount = bombs_amount
+        self.flags = 0
+        n = cols * rows
+        self.visible = bytearray(n)
+        self.hidden = array('b', bytes(n))
+        self.mines = bytearray((n + 7) // 8)
+        self.neighbor_tables = neighbor_tables(cols, rows)
+        self.neighbor_table = self.neighbor_tables.table
+        self._make_views()
+
+    def _make_views(self):
+        cols = self.cols
+        visible = memoryview(self.visible)
+        hidden = memoryview(self.hidden)
+        self.visible_board = [visible[y * cols:(y + 1) * cols] for y in range(self.rows)]
+        self.hidden_board = [hidden[y * cols:(y + 1) * cols] for y in range(self.rows)]
+
+    def init_bombs(self):
+        self.mines[:] = bytes(len(self.mines))
+
+    @property
+    def bombs(self):
+        cols = self.cols
+        return [(i % cols, i // cols) for i in self.mine_indices()]
+
+    @bombs.setter
+    def bombs(self, positions):
+        self.init_bombs()
+        for x, y in positions:
+            self.set_mine(y * self.cols + x)
+
+    def is_mine(self, i):
+        return self.mines[i >> 3] >> (i & 7) & 1
+
+    def set_mine(self, i):
+        self.mines[i >> 3] |= 1 << (i & 7)
+
+    def mine_indices(self):
+        for byte_index, byte in enumerate(self.mines):
+            if byte:
+                base = byte_index << 3
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield base + bit
+
+    def place_bombs(self, first_click_x, first_click_y, rng=None, seed=None):
+        indices = sample_mine_indices(self.cols, self.rows, self.bombs_amount,
+                                      first_click_x, first_click_y, rng, seed)
+        self.mines[:] = pack_mine_bits(indices, self.cols * self.rows)
+        self.fill_hidden(indices)
+
+    def init_hidden_board(self):
+        self.fill_hidden(list(self.mine_indices()))
+
+    def fill_hidden(self, mine_indices):
+        counts = count_neighbor_mines(mine_indices, self.cols, self.rows)
+        memoryview(self.hidden).cast('B')[:] = memoryview(counts).cast('B')
+
+    def count_mines_at(self, i):
+        return sum(self.is_mine(j) for j in self.neighbor_indices(i))
+
+    def count_bombs_around(self, x, y):
+        i = y * self.cols + x
+        return self.is_mine(i) + self.count_mines_at(i)
+
+    def neighbor_indices(self, i):
+        return self.neighbor_tables.of_index(i)
+
+    def neighbors(self, x, y):
+        return self.neighbor_tables.of_cell(x, y)
+
+    def in_range(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows
@@ -1,19 +1,361 @@
+import atexit
+import datetime
+from collections import OrderedDict
+import queue
 import sqlite3
+import threading
+
+from profiler import profiler
+
+DB_PATH = "minesweeper_stats.db"
+
+# Сколько результатов писатель забирает из очереди за одну транзакцию
+WRITE_BATCH = 500
+
+# Сколько лучших побед на сложность хранится в best_times
+BEST_TIMES_KEPT = 10
+
+# Корзина гистограммы времени партии (см. analytics.bucket_bounds): до 10 с -
+# по 0.1 с, до 100 с - по 1 с, до 1000 с - по 10 с, дальше - по 100 с.
+# Относительная погрешность процентилей - не больше 10%.
+DURATION_BUCKET_SQL = """CASE
+        WHEN {d} < 10 THEN CAST({d} * 10 AS INTEGER)
+        WHEN {d} < 100 THEN 90 + CAST({d} AS INTEGER)
+        WHEN {d} < 1000 THEN 180 + CAST({d} / 10 AS INTEGER)
+        ELSE 270 + CAST({d} / 100 AS INTEGER) END"""
+
+# Миграции схемы по порядку; PRAGMA user_version - сколько уже применено.
+# Каждая миграция идемпотентна (IF NOT EXISTS, OR REPLACE/IGNORE), поэтому
+# два соединения, открывшие старую базу одновременно, ничего не сломают.
+MIGRATIONS = [
+    # 1: исходная таблица результатов
+    '''
+    CREATE TABLE IF NOT EXISTS game_stats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        result TEXT NOT NULL,
+        duration REAL NOT NULL
+    );
+    ''',
+    # 2: покрывающий индекс для таблицы лидеров: выборка лучших побед
+    # сложности читает только индекс (date добавлен, чтобы не ходить в таблицу)
+    '''
+    CREATE INDEX IF NOT EXISTS game_stats_leaderboard
+        ON game_stats (difficulty, result, duration, date);
+    ''',
+    # 3: сводка по сложностям и лучшие времена, которые ведут триггеры
+    f'''
+    CREATE TABLE IF NOT EXISTS difficulty_summary (
+        difficulty TEXT PRIMARY KEY,
+        games INTEGER NOT NULL,
+        wins INTEGER NOT NULL,
+        best_duration REAL
+    );
+    CREATE TABLE IF NOT EXISTS best_times (
+        game_id INTEGER PRIMARY KEY,
+        difficulty TEXT NOT NULL,
+        duration REAL NOT NULL,
+        date TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS best_times_difficulty ON best_times (difficulty, duration);
+
+    CREATE TRIGGER IF NOT EXISTS game_stats_summary AFTER INSERT ON game_stats
+    BEGIN
+        INSERT INTO difficulty_summary (difficulty, games, wins, best_duration)
+        VALUES (NEW.difficulty, 1, NEW.result = 'win',
+                CASE WHEN NEW.result = 'win' THEN NEW.duration END)
+        ON CONFLICT (difficulty) DO UPDATE SET
+            games = games + 1,
+            wins = wins + excluded.wins,
+            best_duration = CASE
+                WHEN excluded.best_duration IS NULL THEN best_duration
+                WHEN best_duration IS NULL THEN excluded.best_duration
+                ELSE MIN(best_duration, excluded.best_duration) END;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS game_stats_best_times AFTER INSERT ON game_stats
+    WHEN NEW.result = 'win'
+    BEGIN
+        INSERT INTO best_times (game_id, difficulty, duration, date)
+        VALUES (NEW.id, NEW.difficulty, NEW.duration, NEW.date);
+        DELETE FROM best_times WHERE difficulty = NEW.difficulty AND game_id NOT IN (
+            SELECT game_id FROM best_times WHERE difficulty = NEW.difficulty
+            ORDER BY duration LIMIT {BEST_TIMES_KEPT});
+    END;
+
+    INSERT OR REPLACE INTO difficulty_summary (difficulty, games, wins, best_duration)
+        SELECT difficulty, COUNT(*), SUM(result = 'win'),
+               MIN(CASE WHEN result = 'win' THEN duration END)
+        FROM game_stats GROUP BY difficulty;
+    INSERT OR IGNORE INTO best_times (game_id, difficulty, duration, date)
+        SELECT id, difficulty, duration, date FROM (
+            SELECT id, difficulty, duration, date, ROW_NUMBER() OVER (
+                PARTITION BY difficulty ORDER BY duration) AS place
+            FROM game_stats WHERE result = 'win')
+        WHERE place <= {BEST_TIMES_KEPT};
+    ''',
+    # 4: накопительные агрегаты для analytics: гистограмма времени,
+    # партии по дням и серии побед/поражений
+    f'''
+    CREATE TABLE IF NOT EXISTS duration_histogram (
+        difficulty TEXT NOT NULL,
+        result TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        games INTEGER NOT NULL,
+        PRIMARY KEY (difficulty, result, bucket)
+    );
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        difficulty TEXT NOT NULL,
+        day TEXT NOT NULL,
+        games INTEGER NOT NULL,
+        wins INTEGER NOT NULL,
+        PRIMARY KEY (difficulty, day)
+    );
+    CREATE TABLE IF NOT EXISTS streaks (
+        difficulty TEXT PRIMARY KEY,
+        current_result TEXT NOT NULL,
+        current_length INTEGER NOT NULL,
+        best_win_streak INTEGER NOT NULL,
+        best_lose_streak INTEGER NOT NULL
+    );
+
+    CREATE TRIGGER IF NOT EXISTS game_stats_analytics AFTER INSERT ON game_stats
+    BEGIN
+        INSERT INTO duration_histogram (difficulty, result, bucket, games)
+        VALUES (NEW.difficulty, NEW.result, {DURATION_BUCKET_SQL.format(d="NEW.duration")}, 1)
+        ON CONFLICT (difficulty, result, bucket) DO UPDATE SET games = games + 1;
+
+        INSERT INTO daily_stats (difficulty, day, games, wins)
+        VALUES (NEW.difficulty, substr(NEW.date, 1, 10), 1, NEW.result = 'win')
+        ON CONFLICT (difficulty, day) DO UPDATE SET
+            games = games + 1, wins = wins + excluded.wins;
+
+        INSERT INTO streaks (difficulty, current_result, current_length, best_win_streak, best_lose_streak)
+        VALUES (NEW.difficulty, NEW.result, 1, NEW.result = 'win', NEW.result = 'lose')
+        ON CONFLICT (difficulty) DO UPDATE SET
+            current_length = CASE WHEN current_result = excluded.current_result
+                                  THEN current_length + 1 ELSE 1 END,
+            best_win_streak = MAX(best_win_streak, CASE WHEN excluded.current_result != 'win' THEN 0
+                WHEN current_result = 'win' THEN current_length + 1 ELSE 1 END),
+            best_lose_streak = MAX(best_lose_streak, CASE WHEN excluded.current_result != 'lose' THEN 0
+                WHEN current_result = 'lose' THEN current_length + 1 ELSE 1 END),
+            current_result = excluded.current_result;
+    END;
+
+    INSERT OR REPLACE INTO duration_histogram (difficulty, result, bucket, games)
+        SELECT difficulty, result, {DURATION_BUCKET_SQL.format(d="duration")} AS bucket, COUNT(*)
+        FROM game_stats GROUP BY difficulty, result, bucket;
+    INSERT OR REPLACE INTO daily_stats (difficulty, day, games, wins)
+        SELECT difficulty, substr(date, 1, 10) AS day, COUNT(*), SUM(result = 'win')
+        FROM game_stats GROUP BY difficulty, day;
+    -- Серии: подряд идущие одинаковые результаты дают одинаковую разность номеров
+    INSERT OR REPLACE INTO streaks (difficulty, current_result, current_length,
+                                    best_win_streak, best_lose_streak)
+        WITH numbered AS (
+            SELECT id, difficulty, result,
+                   ROW_NUMBER() OVER (PARTITION BY difficulty ORDER BY id)
+                   - ROW_NUMBER() OVER (PARTITION BY difficulty, result ORDER BY id) AS run
+            FROM game_stats),
+        runs AS (
+            SELECT difficulty, result, COUNT(*) AS length, MAX(id) AS last_id
+            FROM numbered GROUP BY difficulty, result, run)
+        SELECT difficulty,
+               (SELECT result FROM runs AS r WHERE r.difficulty = runs.difficulty
+                ORDER BY last_id DESC LIMIT 1),
+               (SELECT length FROM runs AS r WHERE r.difficulty = runs.difficulty
+                ORDER BY last_id DESC LIMIT 1),
+               MAX(CASE WHEN result = 'win' THEN length ELSE 0 END),
+               MAX(CASE WHEN result = 'lose' THEN length ELSE 0 END)
+        FROM runs GROUP BY difficulty;
+    ''',
+]
+
+
+def connect(path=DB_PATH):
+    # Соединение с журналом WAL: запись не блокирует чтение окна статистики,
+    # а фиксация транзакции не ждёт fsync всего файла базы
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    migrate(conn)
+    return conn
+
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, script in enumerate(MIGRATIONS[version:], version + 1):
+        conn.executescript(f"BEGIN; {script}; PRAGMA user_version = {number}; COMMIT;")
+
+
+def initialize_db(path=DB_PATH):
+    connect(path).close()
+
+
+RESULT_COLUMNS = ("id", "date", "difficulty", "result", "duration")
+
+
+def iter_results(conn, difficulty=None, batch=1000):
+    """Строки game_stats по одной, курсором, без загрузки всей таблицы в память."""
+    query = "SELECT id, date, difficulty, result, duration FROM game_stats"
+    params = ()
+    if difficulty is not None:
+        query += " WHERE difficulty = ?"
+        params = (difficulty,)
+    cursor = conn.execute(query + " ORDER BY id", params)
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            return
+        yield from rows
+
+
+def best_times(conn, difficulty, limit=5):
+    """Лучшие победы сложности: [(дата, время), ...] из таблицы best_times."""
+    return conn.execute('''
+        SELECT date, duration FROM best_times
+        WHERE difficulty = ?
+        ORDER BY duration
+        LIMIT ?
+    ''', (difficulty, min(limit, BEST_TIMES_KEPT))).fetchall()
+
+
+def difficulty_summary(conn, difficulty):
+    """(партий, побед, лучшее время или None) по сложности."""
+    row = conn.execute('''
+        SELECT games, wins, best_duration FROM difficulty_summary WHERE difficulty = ?
+    ''', (difficulty,)).fetchone()
+    return row or (0, 0, None)
+
+
+class QueryCache:
+    """LRU-кеш результатов запросов статистики.
+
+    Ключ - (путь к базе, вид запроса, сложность). Писатель результатов
+    сбрасывает записи сложностей, которые он только что дописал, поэтому
+    повторное открытие статистики без новых партий не читает диск.
+    Результат загрузки, начатой до сброса, в кеш не попадает.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, kind, difficulty, load):
+        key = (path, kind, difficulty)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            generation = self.generation
+        value = load()
+        with self.lock:
+            if generation == self.generation:
+                self.entries[key] = value
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        return value
+
+    def invalidate(self, path, difficulties):
+        with self.lock:
+            self.generation += 1
+            for key in [key for key in self.entries if key[0] == path and key[2] in difficulties]:
+                del self.entries[key]
+
+
+query_cache = QueryCache()
+
+
+class ResultWriter:
+    """Фоновая запись результатов: одно долгоживущее соединение и очередь.
+
+    save() только кладёт строку в очередь, поэтому игровой цикл не ждёт
+    диска. Поток-писатель забирает всё, что накопилось, и пишет одной
+    транзакцией через executemany. flush() ждёт, пока очередь опустеет,
+    close() дописывает остаток и останавливает поток. version растёт
+    после каждой записанной пачки - по нему окно статистики понимает,
+    что пора перечитать данные; записи QueryCache для дописанных
+    сложностей при этом сбрасываются.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path=DB_PATH, cache=query_cache):
+        self.path = path
+        self.cache = cache
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.version = 0
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self.thread.start()
+
+    def save(self, row):
+        self.start()
+        self.queue.put(row)
+
+    def flush(self):
+        if self.thread is not None:
+            self.queue.join()
+
+    def close(self):
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(self._STOP)
+            thread.join()
+
+    def _run(self):
+        conn = connect(self.path)
+        try:
+            stop = False
+            while not stop:
+                batch = [self.queue.get()]
+                while len(batch) < WRITE_BATCH:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                rows = [row for row in batch if row is not self._STOP]
+                stop = len(rows) != len(batch)
+                try:
+                    if rows:
+                        # Замер идёт в потоке писателя, игровой кадр он не задерживает
+                        with profiler.timer('db_write'):
+                            self.write(conn, rows)
+                        profiler.count('results_saved', len(rows))
+                        self.cache.invalidate(self.path, {row[1] for row in rows})
+                        self.version += 1
+                except sqlite3.Error as e:
+                    print(f"[ERROR] Failed to save {len(rows)} game results: {e}")
+                finally:
+                    for _ in batch:
+                        self.queue.task_done()
+        finally:
+            conn.close()
+
+    def write(self, conn, rows):
+        with conn:
+            conn.executemany('''
+                INSERT INTO game_stats (date, difficulty, result, duration)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+
+
+writer = ResultWriter()
+atexit.register(writer.close)
+
+
+def save_game_result(difficulty, result, duration):
+    now = datetime.datetime.now().isoformat()
+    writer.save((now, difficulty, result, duration))
 
-def initialize_db():
-    conn = sqlite3.connect("minesweeper_stats.db")
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS game_stats (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT NOT NULL,
-            difficulty TEXT NOT NULL,
-            result TEXT NOT NULL,
-            duration REAL NOT NULL
-        )
-    ''')
-    conn.commit()
-    conn.close()
 
 if __name__ == "__main__":
     initialize_db()
@@ -0,0 +1,323 @@
+import random
+import time
+from collections import deque
+
+import audio
+from compact_board import CompactBoard, neighbor_tables
+from db import save_game_result
+from placement import SplitMix64, sample_mine_indices, count_neighbor_mines
+from profiler import profiler
+from replay import LEFT, RIGHT, ReplayRecorder
+from snapshot import FIRST_CLICK_DONE, Snapshot, pack_game
+
+# Состояния клеток
+CELL_STATES = ['closed', 'opened', 'flagged', 'bombed', 'nobomb']
+
+DIFFICULTIES = {
+    'Легко': (9, 9, 10),
+    'Средне': (16, 16, 40),
+    'Сложно': (30, 16, 99)
+}
+
+# С такого числа клеток Game по умолчанию использует CompactBoard
+COMPACT_BOARD_CELLS = 10000
+
+
+class Board:
+    def __init__(self, cols, rows, bombs_amount):
+        self.cols = cols
+        self.rows = rows
+        self.bombs_amount = bombs_amount
+        self.flags = 0
+        self.visible_board = [[CELL_STATES.index('closed')] * cols for _ in range(rows)]
+        self.hidden_board = [[0] * cols for _ in range(rows)]
+        self.neighbor_tables = neighbor_tables(cols, rows)
+        self.bombs = []
+        self.init_bombs()
+
+    def init_bombs(self):
+        self.bombs = []
+
+    @property
+    def bombs(self):
+        return self._bombs
+
+    @bombs.setter
+    def bombs(self, positions):
+        # Рядом со списком держим множество для проверок "мина ли здесь"
+        self._bombs = positions
+        self._bomb_set = set(positions)
+
+    def place_bombs(self, first_click_x, first_click_y, rng=None, seed=None):
+        indices = sample_mine_indices(self.cols, self.rows, self.bombs_amount,
+                                      first_click_x, first_click_y, rng, seed)
+        self.bombs = [(i % self.cols, i // self.cols) for i in indices]
+        self.fill_hidden(indices)
+
+    def init_hidden_board(self):
+        self.fill_hidden([y * self.cols + x for x, y in self.bombs])
+
+    def fill_hidden(self, mine_indices):
+        # Все числа считаются за один проход, см. placement.count_neighbor_mines
+        counts = count_neighbor_mines(mine_indices, self.cols, self.rows)
+        self.hidden_board = [counts[y * self.cols:(y + 1) * self.cols].tolist() for y in range(self.rows)]
+
+    def count_bombs_around(self, x, y):
+        # Мины в квадрате 3x3 вместе с самой клеткой
+        bombs = self._bomb_set
+        return ((x, y) in bombs) + sum(1 for cell in self.neighbors(x, y) if cell in bombs)
+
+    def in_range(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows
+
+    def neighbors(self, x, y):
+        return self.neighbor_tables.of_cell(x, y)
+
+
+class Game:
+    def __init__(self, cols, rows, bombs_amount, difficulty, compact=None, rng=None, save_results=True,
+                 seed=None):
+        # compact=True - плоские массивы и таблица соседей (по умолчанию - для
+        # полей от COMPACT_BOARD_CELLS клеток),
+        # seed - зерно расстановки мин (по умолчанию случайное): генератор
+        # SplitMix64(seed), одно поле на любой платформе, по нему партию
+        # можно повторить, см. replay,
+        # rng - готовый генератор вместо seed; такую партию не записать,
+        # save_results=False - не писать результат в базу (симуляции)
+        if rng is None:
+            if seed is None:
+                seed = random.getrandbits(64)
+            rng = SplitMix64(seed)
+        if compact is None:
+            compact = cols * rows >= COMPACT_BOARD_CELLS
+        board_cls = CompactBoard if compact else Board
+        self.board = board_cls(cols, rows, bombs_amount)
+        self.cols = cols
+        self.rows = rows
+        self.flags = 0
+        self.closed_cells = cols * rows
+        self.state = 'playing'
+        self.start_time = None
+        self.elapsed_time = 0
+        self.first_click_done = False
+        self.result_saved = False
+        self.difficulty = difficulty
+        self.rng = rng
+        self.seed = seed
+        self.save_results = save_results
+        # Ходы партии для replay; без seed поле по записи не восстановить
+        self.recorder = ReplayRecorder(cols, rows, bombs_amount, seed) if seed is not None else None
+        # Клетки, изменившиеся с последней отрисовки (см. renderer.BoardRenderer)
+        self.dirty_cells = set()
+        # Подписчики на изменения клеток, например MinesweeperSolver.notify
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def mark_changed(self, cells):
+        self.dirty_cells |= cells
+        for listener in self.listeners:
+            listener(cells)
+
+    def pop_dirty_cells(self):
+        cells = self.dirty_cells
+        self.dirty_cells = set()
+        return cells
+
+    def reveal(self, x, y):
+        return self.open_cells([(x, y)])
+
+    def open_cells(self, cells, sound=True):
+        # Открываем клетки и их пустые области очередью (BFS) за одно действие:
+        # один звук и одна проверка победы. Возвращает множество изменённых клеток.
+        # sound=False - без щелчка (автоигра); взрыв и победа звучат всегда.
+        closed = CELL_STATES.index('closed')
+        opened = CELL_STATES.index('opened')
+        visible = self.board.visible_board
+        hidden = self.board.hidden_board
+
+        changed = set()
+        queue = deque()
+        for x, y in cells:
+            if self.board.in_range(x, y) and visible[y][x] == closed:
+                visible[y][x] = opened
+                changed.add((x, y))
+                queue.append((x, y))
+        if not changed:
+            return changed
+        if self.start_time is None:
+            self.start_time = time.time()
+
+        hit_bomb = False
+        while queue:
+            x, y = queue.popleft()
+            num = hidden[y][x]
+            if num == -1:
+                hit_bomb = True
+            elif num == 0:
+                for i, j in self.board.neighbors(x, y):
+                    if visible[j][i] == closed:
+                        visible[j][i] = opened
+                        changed.add((i, j))
+                        queue.append((i, j))
+
+        self.closed_cells -= len(changed)
+
+        if hit_bomb:
+            audio.play('boom')
+            self.state = 'lose'
+            self.elapsed_time = time.time() - self.start_time  # фиксируем время при проигрыше
+            changed |= self.reveal_all_cells()
+            self.save_result()
+            self.mark_changed(changed)
+            return changed
+
+        if sound:
+            audio.play('click')  # 🔈 Воспроизведение звука открытия
+
+        changed |= self.check_win()
+        self.mark_changed(changed)
+        return changed
+
+    def reveal_all_bombs(self):
+        for (x, y) in self.board.bombs:
+            if self.board.visible_board[y][x] != CELL_STATES.index('flagged'):
+                self.board.visible_board[y][x] = CELL_STATES.index('bombed')
+
+    def reveal_all_cells(self):
+        changed = set()
+        for y in range(self.rows):
+            for x in range(self.cols):
+                if self.board.visible_board[y][x] == CELL_STATES.index('closed'):
+                    if self.board.hidden_board[y][x] == -1:
+                        self.board.visible_board[y][x] = CELL_STATES.index('bombed')
+                    else:
+                        self.board.visible_board[y][x] = CELL_STATES.index('opened')
+                    changed.add((x, y))
+        return changed
+
+    def replay_bytes(self):
+        # Запись партии в формате replay (None, если партия без seed)
+        if self.recorder is None:
+            return None
+        return self.recorder.to_bytes(self.state)
+
+    def snapshot(self):
+        # Позиция в компактном бинарном виде (см. snapshot), обратное - Game.restore
+        return pack_game(self)
+
+    @classmethod
+    def restore(cls, data, compact=None, save_results=True):
+        # Игра, продолжающаяся с позиции снимка. Клики до снимка неизвестны,
+        # поэтому партию после первого клика дальше не записываем
+        snap = Snapshot(data)
+        game = cls(snap.cols, snap.rows, snap.bombs, snap.difficulty, compact=compact,
+                   seed=snap.seed, save_results=save_results)
+        if snap.flags & FIRST_CLICK_DONE or snap.seed is None:
+            game.recorder = None
+        return snap.restore_into(game)
+
+    def on_left_click(self, x, y):
+        if self.state != 'playing':
+            return set()
+        if self.recorder is not None:
+            self.recorder.add(LEFT, x, y)
+
+        if not self.first_click_done:
+            self.board.place_bombs(x, y, self.rng)
+            self.first_click_done = True
+
+        if self.board.visible_board[y][x] == CELL_STATES.index('opened'):
+            bombs_around = self.board.hidden_board[y][x]
+            neighbors = list(self.board.neighbors(x, y))
+            flags_around = sum(1 for i, j in neighbors
+                               if self.board.visible_board[j][i] == CELL_STATES.index('flagged'))
+            if flags_around == bombs_around:
+                # Все закрытые соседи открываются одним действием
+                return self.open_cells(neighbors)
+        elif self.board.visible_board[y][x] == CELL_STATES.index('closed'):
+            return self.reveal(x, y)
+        return set()
+
+    def on_right_click(self, x, y):
+        if self.state != 'playing':
+            return set()
+        if self.recorder is not None:
+            self.recorder.add(RIGHT, x, y)
+        audio.play('flag')
+        state = self.board.visible_board[y][x]
+        if state == CELL_STATES.index('closed'):
+            if self.flags < self.board.bombs_amount:
+                self.board.visible_board[y][x] = CELL_STATES.index('flagged')
+                self.flags += 1
+                self.mark_changed({(x, y)})
+                return {(x, y)}
+        elif state == CELL_STATES.index('flagged'):
+            self.board.visible_board[y][x] = CELL_STATES.index('closed')
+            self.flags -= 1
+            self.mark_changed({(x, y)})
+            return {(x, y)}
+        return set()
+
+    def flag_cells(self, cells):
+        # Поставить флаги сразу на несколько закрытых клеток, без звука
+        closed = CELL_STATES.index('closed')
+        flagged = CELL_STATES.index('flagged')
+        visible = self.board.visible_board
+        changed = set()
+        for x, y in cells:
+            if self.flags >= self.board.bombs_amount:
+                break
+            if visible[y][x] == closed:
+                visible[y][x] = flagged
+                self.flags += 1
+                changed.add((x, y))
+        if changed:
+            self.mark_changed(changed)
+        return changed
+
+    def apply_actions(self, actions):
+        # Ходы решателя одним пакетом: все флаги, затем все открытия,
+        # без звука на каждый ход. Возвращает множество изменённых клеток.
+        if self.state != 'playing':
+            return set()
+        flags = [(x, y) for action, x, y in actions if action == 'flag']
+        opens = [(x, y) for action, x, y in actions if action == 'open']
+        changed = self.flag_cells(flags)
+        if self.recorder is None:
+            return changed | self.open_cells(opens, sound=False)
+
+        # В записи ходы должны выглядеть как обычные клики: открываем по одной
+        # клетке и пропускаем уже открытые заливкой - иначе при повторе левый
+        # клик по открытой клетке сработал бы как аккорд
+        for x, y in flags:
+            if (x, y) in changed:
+                self.recorder.add(RIGHT, x, y)
+        closed = CELL_STATES.index('closed')
+        visible = self.board.visible_board
+        for x, y in opens:
+            if self.state != 'playing':
+                break
+            if visible[y][x] == closed:
+                self.recorder.add(LEFT, x, y)
+                changed |= self.open_cells([(x, y)], sound=False)
+        return changed
+
+    def check_win(self):
+        if self.closed_cells == self.board.bombs_amount and self.state == 'playing':
+            self.state = 'win'
+            self.elapsed_time = time.time() - self.start_time
+            changed = self.reveal_all_cells()
+            audio.play('win')  # 🔈 Звук победы
+            self.save_result()
+            return changed
+        return set()
+
+    def save_result(self):
+        if self.result_saved or not self.save_results:
+            return
+        with profiler.timer('save_result'):
+            save_game_result(self.difficulty, self.state, self.elapsed_time)
+        print(f"[LOG] Saved result: {self.difficulty}, {self.state}, {self.elapsed_time}")
+        self.result_saved = True
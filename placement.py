@@ -0,0 +1,252 @@
+import math
+import os
+import random
+import sys
+from array import array
+from bisect import bisect_right
+
+_numpy = False
+
+
+def get_numpy():
+    """numpy, если установлен, иначе None. Импортируется при первом вызове."""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:  # без numpy всё считается обычными циклами
+            _numpy = None
+    return _numpy
+
+
+def safe_zone(cols, rows, first_click_x, first_click_y):
+    """Индексы клеток 3x3 вокруг первого клика - там мин быть не должно."""
+    return sorted(y * cols + x
+                  for x in range(first_click_x - 1, first_click_x + 2)
+                  for y in range(first_click_y - 1, first_click_y + 2)
+                  if 0 <= x < cols and 0 <= y < rows)
+
+
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def mix64(z):
+    """Финальное перемешивание SplitMix64."""
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & MASK64
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EB & MASK64
+    return z ^ (z >> 31)
+
+
+class SplitMix64(random.Random):
+    """Счётчиковый генератор: i-е слово - mix64(key + i * GOLDEN_GAMMA).
+
+    Состояние - ключ и номер слова, поэтому поток можно разрезать без
+    общего состояния: SplitMix64(seed, stream=k) - независимый поток k
+    (например, у каждого процесса симуляции свой), а words(n) считает
+    n слов разом (с numpy - векторно). Наследует random.Random, так что
+    randrange, choice, sample и остальное работают поверх getrandbits.
+    """
+
+    def __init__(self, seed=None, stream=0):
+        self.stream = stream
+        super().__init__(seed)
+
+    def seed(self, a=None, version=2):
+        if a is None:
+            a = int.from_bytes(os.urandom(8), 'little')
+        elif not isinstance(a, int):
+            raise TypeError("SplitMix64 seed must be an int")
+        key = mix64(a & MASK64)
+        if self.stream:
+            key = mix64(key ^ mix64((self.stream * GOLDEN_GAMMA) & MASK64))
+        self.key = key
+        self.counter = 0
+        self.gauss_next = None
+
+    def getstate(self):
+        return self.key, self.counter, self.stream
+
+    def setstate(self, state):
+        self.key, self.counter, self.stream = state
+
+    def next64(self):
+        self.counter += 1
+        return mix64((self.key + self.counter * GOLDEN_GAMMA) & MASK64)
+
+    def words(self, count):
+        """count следующих 64-битных слов, little-endian байтами."""
+        start = self.counter
+        self.counter += count
+        np = get_numpy()
+        if np is not None:
+            z = np.arange(start + 1, start + count + 1, dtype=np.uint64)
+            z = z * np.uint64(GOLDEN_GAMMA) + np.uint64(self.key)
+            z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            z ^= z >> np.uint64(31)
+            return z.astype('<u8').tobytes()
+        key = self.key
+        return b''.join(mix64((key + i * GOLDEN_GAMMA) & MASK64).to_bytes(8, 'little')
+                        for i in range(start + 1, start + count + 1))
+
+    def random(self):
+        return (self.next64() >> 11) * (1.0 / (1 << 53))
+
+    def getrandbits(self, k):
+        if k <= 64:
+            return self.next64() >> (64 - k) if k else 0
+        count = (k + 63) // 64
+        return int.from_bytes(self.words(count), 'little') >> (count * 64 - k)
+
+
+def make_rng(rng=None, seed=None):
+    """Генератор для расстановки мин: готовый rng, SplitMix64(seed) или модуль random."""
+    if rng is not None:
+        return rng
+    if seed is not None:
+        return SplitMix64(seed)
+    return random
+
+
+def random_words(rng, count):
+    """count 64-битных слов из rng байтами; у SplitMix64 - векторно через words()."""
+    words = getattr(rng, 'words', None)
+    if words is not None:
+        return words(count)
+    return rng.getrandbits(64 * count).to_bytes(8 * count, 'little')
+
+
+def sample_distinct(k, n, rng):
+    """k разных чисел из range(n), n < 2**32, по возрастанию.
+
+    Слова rng режутся на 32-битные кандидаты, каждый переводится в
+    range(n) методом Лемира (умножение со сдвигом, с отбросом для
+    равномерности); берутся первые k разных. Размер каждой порции слов
+    зависит только от k, n и уже найденного, поэтому путь с numpy и без
+    него читают из rng одно и то же и дают одинаковый результат.
+    """
+    threshold = ((1 << 32) - n) % n if n else 0
+    np = get_numpy()
+    chosen = np.empty(0, dtype=np.uint64) if np is not None else set()
+    while len(chosen) < k:
+        missing = k - len(chosen)
+        # Ожидаемое число кандидатов до missing новых плюс запас
+        expected = n * math.log(n / (n - missing)) if missing < n else n * math.log(n) + n
+        count = (int(expected * 1.1) + 64) // 2
+        data = random_words(rng, count)
+        if np is not None:
+            product = np.frombuffer(data, dtype='<u4').astype(np.uint64) * np.uint64(n)
+            candidates = (product >> np.uint64(32))[(product & np.uint64(0xFFFFFFFF)) >= threshold]
+            merged = np.concatenate((chosen, candidates))
+            # Первые вхождения: сортируем пары (значение, позиция) одним
+            # ключом и оставляем у каждого значения наименьшую позицию
+            size = np.uint64(len(merged))
+            keys = np.sort(merged * size + np.arange(len(merged), dtype=np.uint64))
+            values = keys // size
+            first = np.ones(len(keys), dtype=bool)
+            first[1:] = values[1:] != values[:-1]
+            chosen = merged[np.sort(keys[first] % size)[:k]]
+        else:
+            words = array('I', data)
+            if sys.byteorder == 'big':
+                words.byteswap()
+            for r in words:
+                product = r * n
+                if product & 0xFFFFFFFF >= threshold:
+                    chosen.add(product >> 32)
+                    if len(chosen) == k:
+                        break
+    if np is not None:
+        return np.sort(chosen).astype(np.int64)
+    return sorted(chosen)
+
+
+def sample_mine_indices(cols, rows, amount, first_click_x, first_click_y, rng=None, seed=None):
+    """Случайные индексы мин без построения списка всех позиций.
+
+    Выбираем amount чисел из range(n - len(exclude)) и сдвигаем каждое
+    за исключённые клетки, так что работа O(amount), а не O(cols * rows).
+    Если мин больше половины свободных клеток, выбираются клетки без мин.
+    rng - любой генератор с getrandbits (по умолчанию модуль random),
+    seed - вместо rng, тогда генератор SplitMix64(seed). Выборка одна и
+    та же с numpy и без него (см. sample_distinct), так что одинаковый
+    seed даёт одинаковое поле в любом процессе и на любой платформе.
+    """
+    rng = make_rng(rng, seed)
+    exclude = safe_zone(cols, rows, first_click_x, first_click_y)
+    # shifted[j] - сколько свободных клеток лежит до j-й исключённой
+    shifted = [e - j for j, e in enumerate(exclude)]
+    free = cols * rows - len(exclude)
+    if not 0 <= amount <= free:
+        raise ValueError(f"cannot place {amount} mines on {free} free cells")
+    invert = amount > free // 2
+    picked = sample_distinct(free - amount if invert else amount, free, rng)
+    np = get_numpy()
+    if np is not None:
+        if invert:
+            picked = np.setdiff1d(np.arange(free, dtype=np.int64), picked, assume_unique=True)
+        return (picked + np.searchsorted(shifted, picked, side='right')).tolist()
+    if invert:
+        taken = set(picked)
+        picked = [s for s in range(free) if s not in taken]
+    return [s + bisect_right(shifted, s) for s in picked]
+
+
+def pack_mine_bits(mine_indices, n):
+    """Битовое множество мин (младший бит - меньший индекс)."""
+    bits = bytearray((n + 7) // 8)
+    np = get_numpy()
+    if np is not None:
+        flags = np.zeros(len(bits) * 8, dtype=np.uint8)
+        flags[np.asarray(mine_indices, dtype=np.int64)] = 1
+        bits[:] = np.packbits(flags, bitorder='little').tobytes()
+        return bits
+    for i in mine_indices:
+        bits[i >> 3] |= 1 << (i & 7)
+    return bits
+
+
+def unpack_mine_bits(bits, n):
+    """Индексы мин из битового множества (обратное к pack_mine_bits)."""
+    np = get_numpy()
+    if np is not None:
+        flags = np.unpackbits(np.frombuffer(bits, dtype=np.uint8), bitorder='little')[:n]
+        return np.flatnonzero(flags).tolist()
+    indices = []
+    for byte_index, byte in enumerate(bits):
+        if byte:
+            base = byte_index << 3
+            indices.extend(base + bit for bit in range(8) if byte >> bit & 1)
+    return indices
+
+
+def count_neighbor_mines(mine_indices, cols, rows):
+    """Числа для всех клеток сразу: int8 на клетку, -1 - мина.
+
+    С numpy - сумма девяти сдвигов дополненной нулями сетки мин
+    (свёртка с ядром 3x3), без numpy - проход по соседям каждой мины.
+    """
+    n = cols * rows
+    np = get_numpy()
+    if np is not None:
+        grid = np.zeros((rows + 2, cols + 2), dtype=np.int8)
+        idx = np.asarray(mine_indices, dtype=np.int64)
+        grid[idx // cols + 1, idx % cols + 1] = 1
+        counts = np.zeros((rows, cols), dtype=np.int8)
+        for dy in range(3):
+            for dx in range(3):
+                counts += grid[dy:dy + rows, dx:dx + cols]
+        counts[grid[1:-1, 1:-1] == 1] = -1
+        return array('b', counts.tobytes())
+
+    counts = array('b', bytes(n))
+    for i in mine_indices:
+        x, y = i % cols, i // cols
+        for ny in range(max(y - 1, 0), min(y + 2, rows)):
+            for nx in range(max(x - 1, 0), min(x + 2, cols)):
+                counts[ny * cols + nx] += 1
+    for i in mine_indices:
+        counts[i] = -1
+    return counts
@@ -0,0 +1,207 @@
+from math import exp, lgamma, log
+
+# Вероятности мин на границе открытой области.
+#
+# Граница (закрытые клетки рядом с открытыми числами) разбивается на
+# независимые компоненты: клетки связаны, если входят в одно ограничение.
+# Для каждой компоненты считается, сколькими способами в ней можно
+# расставить k мин (и сколько из них ставят мину в каждую клетку).
+# Компоненты объединяются свёрткой, а оставшиеся мины раскладываются по
+# внутренним закрытым клеткам - отсюда биномиальный вес C(U, M - t).
+
+
+def poly_add(dst, src, shift=0):
+    """dst[k + shift] += src[k]; многочлены - списки чисел по степеням."""
+    need = len(src) + shift
+    if len(dst) < need:
+        dst.extend([0] * (need - len(dst)))
+    for k, value in enumerate(src):
+        if value:
+            dst[k + shift] += value
+    return dst
+
+
+def poly_mul(a, b):
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                if y:
+                    result[i + j] += x * y
+    return result
+
+
+def log_comb(n, k):
+    return lgamma(n + 1) - lgamma(k + 1) - lgamma(n - k + 1)
+
+
+def split_components(constraints, cell_constraints, starts=None):
+    """Независимые компоненты границы: список (клетки, ограничения).
+
+    constraints - клетка с числом -> (frozenset закрытых соседей, мин),
+    cell_constraints - обратный индекс (закрытая клетка -> клетки с числами).
+    starts - закрытые клетки, компоненты которых нужны; по умолчанию вся
+    граница. Клетки компоненты идут в порядке обхода в ширину, так соседние
+    по ограничениям клетки оказываются рядом, и перебор закрывает
+    ограничения быстро.
+    """
+    if starts is None:
+        starts = cell_constraints
+    seen = set()
+    components = []
+    for start in sorted(starts):
+        if start in seen or start not in cell_constraints:
+            continue
+        seen.add(start)
+        cells = [start]
+        owners = set()
+        for cell in cells:
+            for owner in cell_constraints[cell]:
+                if owner in owners:
+                    continue
+                owners.add(owner)
+                for other in sorted(constraints[owner][0]):
+                    if other not in seen:
+                        seen.add(other)
+                        cells.append(other)
+        components.append((cells, [constraints[owner] for owner in sorted(owners)]))
+    return components
+
+
+def enumerate_component(cells, constraints):
+    """Все расстановки мин в компоненте, сгруппированные по числу мин.
+
+    Возвращает (totals, per_cell): totals[k] - сколько расстановок с k
+    минами, per_cell[i][k] - сколько из них ставят мину в cells[i].
+
+    Перебор идёт по клеткам по порядку, с отсечением: у каждого
+    ограничения остаток мин не может быть отрицательным или больше числа
+    ещё не назначенных клеток. Состояние после i клеток - только остатки
+    "открытых" ограничений (начатых, но не законченных), поэтому
+    одинаковые состояния склеиваются (мемоизация): прямой проход считает
+    способы дойти до состояния, обратный - способы его завершить.
+    """
+    n = len(cells)
+    pos = {cell: i for i, cell in enumerate(cells)}
+    mines = []
+    first = []
+    last = []
+    # для каждой клетки: (ограничение, сколько его клеток идёт после неё)
+    cell_cons = [[] for _ in range(n)]
+    for ci, (closed, m) in enumerate(constraints):
+        idx = sorted(pos[cell] for cell in closed)
+        mines.append(m)
+        first.append(idx[0])
+        last.append(idx[-1])
+        for order, i in enumerate(idx):
+            cell_cons[i].append((ci, len(idx) - order - 1))
+
+    active = [[] for _ in range(n + 1)]
+    for ci in range(len(constraints)):
+        for i in range(first[ci] + 1, last[ci] + 1):
+            active[i].append(ci)
+
+    forward = [{} for _ in range(n + 1)]
+    forward[0][()] = [1]
+    moves = [[] for _ in range(n)]
+    for i in range(n):
+        current, following = active[i], active[i + 1]
+        layer = forward[i + 1]
+        for state, ways in forward[i].items():
+            left = dict(zip(current, state))
+            for mine in (0, 1):
+                new = {}
+                for ci, after in cell_cons[i]:
+                    rest = left.get(ci, mines[ci]) - mine
+                    if rest < 0 or rest > after:
+                        break
+                    new[ci] = rest
+                else:
+                    next_state = tuple(new[ci] if ci in new else left[ci] for ci in following)
+                    poly_add(layer.setdefault(next_state, []), ways, mine)
+                    moves[i].append((state, mine, next_state))
+
+    backward = [{} for _ in range(n + 1)]
+    backward[n][()] = [1]
+    for i in range(n - 1, -1, -1):
+        layer = backward[i]
+        following = backward[i + 1]
+        for state, mine, next_state in moves[i]:
+            rest = following.get(next_state)
+            if rest is not None:
+                poly_add(layer.setdefault(state, []), rest, mine)
+
+    totals = backward[0].get((), [])
+    per_cell = []
+    for i in range(n):
+        counts = []
+        for state, mine, next_state in moves[i]:
+            rest = backward[i + 1].get(next_state)
+            if mine and rest is not None:
+                poly_add(counts, poly_mul(forward[i][state], rest), 1)
+        per_cell.append(counts)
+    return totals, per_cell
+
+
+def log_sum(terms):
+    terms = list(terms)
+    if not terms:
+        return None
+    top = max(terms)
+    return top + log(sum(exp(t - top) for t in terms))
+
+
+def combine(components, mines_left, interior):
+    """Вероятности мин по результатам перебора компонент.
+
+    components - список (cells, totals, per_cell), mines_left - сколько
+    мин не отмечено флагами, interior - число закрытых клеток вне границы.
+    Возвращает (словарь клетка -> вероятность, вероятность для внутренней
+    клетки или None). Если расстановок нет (например, неверный флаг) -
+    ({}, None).
+    """
+    count = len(components)
+    # prefix[j] - свёртка компонент до j, suffix[j] - начиная с j
+    prefix = [[1]]
+    for _, totals, _ in components:
+        prefix.append(poly_mul(prefix[-1], totals))
+    suffix = [[1]] * (count + 1)
+    for j in range(count - 1, -1, -1):
+        suffix[j] = poly_mul(components[j][1], suffix[j + 1])
+
+    def tail_weight(poly, mines):
+        # log sum_t poly[t] * C(interior, mines - t)
+        return log_sum(log(ways) + log_comb(interior, mines - t)
+                       for t, ways in enumerate(poly)
+                       if ways and 0 <= mines - t <= interior)
+
+    if tail_weight(prefix[-1], mines_left) is None:
+        return {}, None
+
+    probs = {}
+    for j, (cells, totals, per_cell) in enumerate(components):
+        others = poly_mul(prefix[j], suffix[j + 1])
+        weights = {}
+        for k, ways in enumerate(totals):
+            if ways:
+                rest = tail_weight(others, mines_left - k)
+                if rest is not None:
+                    weights[k] = log(ways) + rest
+        top = max(weights.values())
+        weights = {k: exp(w - top) for k, w in weights.items()}
+        norm = sum(weights.values())
+        for cell, counts in zip(cells, per_cell):
+            probs[cell] = sum(w * counts[k] / totals[k]
+                              for k, w in weights.items() if k < len(counts)) / norm
+
+    interior_prob = None
+    if interior:
+        frontier = prefix[-1]
+        weights = {t: log(ways) + log_comb(interior, mines_left - t)
+                   for t, ways in enumerate(frontier)
+                   if ways and 0 <= mines_left - t <= interior}
+        top = max(weights.values())
+        norm = sum(exp(w - top) for w in weights.values())
+        expected = sum(exp(w - top) * (mines_left - t) for t, w in weights.items())
+        interior_prob = expected / norm / interior
+    return probs, interior_prob
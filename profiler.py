@@ -0,0 +1,156 @@
+import json
+import math
+import time
+from collections import deque
+
+# Лёгкие замеры по фазам кадра: именованные таймеры и счётчики.
+# Выключенный профайлер почти ничего не стоит: start() возвращает None,
+# stop() и count() сразу выходят, timer() отдаёт общий пустой контекст.
+
+PROFILE_PATH = "minesweeper_profile.json"
+
+# Гистограмма: четыре корзины на удвоение времени, от 1 мкс
+BUCKETS_PER_OCTAVE = 4
+
+# Сколько последних замеров каждой фазы хранится для процентилей
+RECENT = 600
+
+
+def bucket_of(seconds):
+    if seconds <= 1e-6:
+        return 0
+    return int(math.log2(seconds * 1e6) * BUCKETS_PER_OCTAVE)
+
+
+def bucket_upper(bucket):
+    """Верхняя граница корзины в секундах."""
+    return 2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE) / 1e6
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('profiler', 'name', 'started')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Profiler:
+    """Таймеры и счётчики по именам фаз, включаются на лету.
+
+    with profiler.timer('draw_ui'): ... или started = profiler.start() ...
+    profiler.stop('events', started) - для кусков, которые неудобно
+    оборачивать в with. Для каждой фазы копится гистограмма всех замеров
+    и RECENT последних - по ним считаются процентили для оверлея.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.recent = {}
+        self.counters = {}
+        self.frame_started = None
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        self.frame_started = None
+
+    def toggle(self):
+        self.enable(not self.enabled)
+        return self.enabled
+
+    def reset(self):
+        self.histograms = {}
+        self.recent = {}
+        self.counters = {}
+
+    def timer(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def start(self):
+        if not self.enabled:
+            return None
+        return time.perf_counter()
+
+    def stop(self, name, started):
+        if started is None:
+            return
+        self.record(name, time.perf_counter() - started)
+
+    def frame_start(self):
+        self.frame_started = self.start()
+
+    def frame_end(self):
+        self.stop('frame', self.frame_started)
+        self.frame_started = None
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = {}
+            self.recent[name] = deque(maxlen=RECENT)
+        bucket = bucket_of(seconds)
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+        self.recent[name].append(seconds)
+
+    def percentiles(self, name, percentiles=(0.5, 0.9, 0.99)):
+        """Процентили последних замеров фазы в секундах; None - замеров нет."""
+        samples = sorted(self.recent.get(name, ()))
+        if not samples:
+            return dict.fromkeys(percentiles)
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in percentiles}
+
+    def summary_lines(self):
+        """Строки для оверлея: кадр и фазы по убыванию медианы, в мс."""
+        lines = []
+        for name in sorted(self.recent, key=lambda n: (n != 'frame', -self.percentiles(n)[0.5])):
+            p = self.percentiles(name)
+            lines.append(f"{name}: {p[0.5] * 1000:.2f} / {p[0.9] * 1000:.2f} / {p[0.99] * 1000:.2f} мс")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}: {value}")
+        return lines
+
+    def export(self, path=PROFILE_PATH):
+        """Гистограммы всех фаз и счётчики в JSON; корзина - верхняя граница в мкс."""
+        data = {
+            'phases': {
+                name: {
+                    'count': sum(histogram.values()),
+                    'histogram_us': {f"{bucket_upper(b) * 1e6:.1f}": n for b, n in sorted(histogram.items())},
+                    'recent_ms': {f"p{int(q * 100)}": v * 1000 for q, v in self.percentiles(name).items()},
+                }
+                for name, histogram in self.histograms.items()
+            },
+            'counters': self.counters,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+profiler = Profiler()
@@ -0,0 +1,200 @@
+import pygame
+
+from game import CELL_STATES
+
+CELL_SIZE = 30
+BACKGROUND = (192, 192, 192)
+
+# Доступные размеры клетки в пикселях (уровни масштаба)
+ZOOM_LEVELS = [8, 12, 16, 20, 30, 40, 60]
+
+# Если за кадр изменилось больше клеток, отправляем на экран один общий прямоугольник
+MAX_DIRTY_RECTS = 64
+
+# Картинка для каждого состояния, кроме 'opened' (там картинка зависит от числа)
+STATE_IMAGES = {
+    CELL_STATES.index('closed'): 'closed',
+    CELL_STATES.index('flagged'): 'flagged',
+    CELL_STATES.index('bombed'): 'bombed',
+    CELL_STATES.index('nobomb'): 'noBomb',
+}
+
+
+IMAGE_NAMES = ['bomb', 'bombed', 'closed', 'flagged', 'noBomb', 'opened'] + [f'num{i}' for i in range(9)]
+
+
+def load_cell_images(convert=True):
+    """Картинки клеток из res/images. convert=True - под формат экрана (нужно окно)."""
+    images = {}
+    for name in IMAGE_NAMES:
+        path = f'res/images/{name}.png'
+        try:
+            # Масштабирует под текущий зум TileCache
+            image = pygame.image.load(path)
+            images[name] = image.convert_alpha() if convert else image
+        except Exception as e:
+            print(f"[ERROR] Failed to load {path}: {e}")
+    return images
+
+
+def cell_image_name(state, num):
+    if state == CELL_STATES.index('opened'):
+        return 'bomb' if num == -1 else f'num{num}'
+    return STATE_IMAGES[state]
+
+
+class Camera:
+    """Окно просмотра поля: смещение в пикселях и текущий размер клетки.
+
+    Все переводы экран <-> клетка идут через камеру, поэтому поле может
+    быть больше окна. version меняется при каждом сдвиге или смене масштаба.
+    """
+
+    def __init__(self, cols, rows, view_width, view_height, cell_size=CELL_SIZE):
+        self.cols = cols
+        self.rows = rows
+        self.view_width = view_width
+        self.view_height = view_height
+        self.cell_size = cell_size
+        self.x = 0
+        self.y = 0
+        self.version = 0
+
+    def _clamp(self):
+        self.x = max(0, min(self.x, self.cols * self.cell_size - self.view_width))
+        self.y = max(0, min(self.y, self.rows * self.cell_size - self.view_height))
+
+    def pan(self, dx, dy):
+        old = (self.x, self.y)
+        self.x += dx
+        self.y += dy
+        self._clamp()
+        if (self.x, self.y) != old:
+            self.version += 1
+
+    def zoom(self, steps, anchor=None):
+        levels = sorted(set(ZOOM_LEVELS) | {self.cell_size})
+        index = max(0, min(levels.index(self.cell_size) + steps, len(levels) - 1))
+        new_size = levels[index]
+        if new_size == self.cell_size:
+            return
+        # Точка под курсором (или центр окна) остаётся на месте
+        ax, ay = anchor if anchor is not None else (self.view_width // 2, self.view_height // 2)
+        self.x = (self.x + ax) * new_size // self.cell_size - ax
+        self.y = (self.y + ay) * new_size // self.cell_size - ay
+        self.cell_size = new_size
+        self._clamp()
+        self.version += 1
+
+    def screen_to_cell(self, mx, my):
+        if not (0 <= mx < self.view_width and 0 <= my < self.view_height):
+            return None
+        x = (mx + self.x) // self.cell_size
+        y = (my + self.y) // self.cell_size
+        if x >= self.cols or y >= self.rows:
+            return None
+        return x, y
+
+    def cell_rect(self, x, y):
+        size = self.cell_size
+        return pygame.Rect(x * size - self.x, y * size - self.y, size, size)
+
+    def visible_range(self):
+        size = self.cell_size
+        x0 = self.x // size
+        y0 = self.y // size
+        x1 = min(self.cols, (self.x + self.view_width - 1) // size + 1)
+        y1 = min(self.rows, (self.y + self.view_height - 1) // size + 1)
+        return x0, y0, x1, y1
+
+    def is_visible(self, x, y):
+        x0, y0, x1, y1 = self.visible_range()
+        return x0 <= x < x1 and y0 <= y < y1
+
+
+class TileCache:
+    """Картинки клеток, отмасштабированные один раз на каждый уровень зума."""
+
+    def __init__(self, images):
+        self.images = images
+        self.scaled = {}
+
+    def get(self, cell_size):
+        tiles = self.scaled.get(cell_size)
+        if tiles is None:
+            tiles = {name: pygame.transform.scale(image, (cell_size, cell_size))
+                     for name, image in self.images.items()}
+            self.scaled[cell_size] = tiles
+        return tiles
+
+
+def draw_board(screen, game, images, camera=None):
+    if camera is not None:
+        # Только клетки, попадающие в окно камеры
+        x0, y0, x1, y1 = camera.visible_range()
+        for y in range(y0, y1):
+            visible_row = game.board.visible_board[y]
+            hidden_row = game.board.hidden_board[y]
+            for x in range(x0, x1):
+                screen.blit(images[cell_image_name(visible_row[x], hidden_row[x])], camera.cell_rect(x, y))
+        return
+
+    # Идём по строкам: и для Board, и для CompactBoard строка - это
+    # готовая последовательность, без повторной индексации visible_board[y]
+    for y, (visible_row, hidden_row) in enumerate(zip(game.board.visible_board, game.board.hidden_board)):
+        for x, cell in enumerate(visible_row):
+            rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+            screen.blit(images[cell_image_name(cell, hidden_row[x])], rect)
+
+
+class BoardRenderer:
+    """Кешированная поверхность окна поля, перерисовывает только изменённые клетки.
+
+    render() забирает у Game изменённые клетки (pop_dirty_cells), обновляет
+    видимые из них на кеше, копирует на экран и возвращает прямоугольники
+    для pygame.display.update(). Окно поля - в левом верхнем углу экрана.
+    Без камеры окно совпадает со всем полем в масштабе CELL_SIZE.
+    """
+
+    def __init__(self, images, cols, rows, camera=None):
+        self.tiles = TileCache(images)
+        self.camera = camera or Camera(cols, rows, cols * CELL_SIZE, rows * CELL_SIZE)
+        self.surface = pygame.Surface((self.camera.view_width, self.camera.view_height))
+        self.drawn = None
+
+    def invalidate(self):
+        self.drawn = None
+
+    def render(self, screen, game):
+        camera = self.camera
+        images = self.tiles.get(camera.cell_size)
+        if self.drawn != (game, camera.version):
+            # Новая игра, сдвиг/зум камеры или сброс кеша - рисуем окно целиком
+            self.drawn = (game, camera.version)
+            game.pop_dirty_cells()
+            self.surface.fill(BACKGROUND)
+            draw_board(self.surface, game, images, camera)
+            screen.blit(self.surface, (0, 0))
+            return [self.surface.get_rect()]
+
+        cells = game.pop_dirty_cells()
+        if not cells:
+            return []
+
+        rects = []
+        view = self.surface.get_rect()
+        visible = game.board.visible_board
+        hidden = game.board.hidden_board
+        x0, y0, x1, y1 = camera.visible_range()
+        for x, y in cells:
+            if not (x0 <= x < x1 and y0 <= y < y1):
+                continue
+            rect = camera.cell_rect(x, y)
+            self.surface.blit(images[cell_image_name(visible[y][x], hidden[y][x])], rect)
+            rect = rect.clip(view)
+            screen.blit(self.surface, rect, rect)
+            rects.append(rect)
+
+        if len(rects) > MAX_DIRTY_RECTS:
+            return [rects[0].unionall(rects[1:])]
+        return rects
@@ -0,0 +1,216 @@
+import argparse
+import mmap
+import struct
+import time
+
+# Запись партии: seed генератора мин, размеры поля и поток кликов.
+#
+# Формат (little-endian), запись за записью без разделителей:
+#   заголовок HEADER (30 байт): b'MSRP', версия, результат, cols, rows,
+#       bombs, seed, первый левый клик (x, y; -1 - не было), число ходов;
+#   ходы ACTION по 6 байт: (индекс клетки << 1) | правая кнопка,
+#       пауза после предыдущего хода в мс (не больше 65535).
+# Поле восстанавливается из seed (см. Game(seed=...)), поэтому мины не
+# хранятся. Архив - просто склеенные записи; его можно отобразить в память
+# (ReplayArchive) и читать ходы без копирования, например
+# numpy.frombuffer(replay.actions, ACTION_DTYPE).
+
+MAGIC = b'MSRP'
+# 2 - поле из SplitMix64(seed) и общей для numpy и чистого Python выборки
+VERSION = 2
+HEADER = struct.Struct('<4sBBHHIQhhI')
+ACTION = struct.Struct('<IH')
+ACTION_DTYPE = [('code', '<u4'), ('delay_ms', '<u2')]
+
+LEFT, RIGHT = 0, 1
+RESULTS = ['playing', 'win', 'lose']
+MAX_DELAY_MS = 0xFFFF
+
+REPLAY_PATH = "minesweeper_replays.bin"
+
+
+class ReplayRecorder:
+    """Копит ходы партии в bytearray; Game вызывает add() на каждый клик."""
+
+    def __init__(self, cols, rows, bombs, seed):
+        self.cols = cols
+        self.rows = rows
+        self.bombs = bombs
+        self.seed = seed
+        self.first_click = (-1, -1)
+        self.actions = bytearray()
+        self.count = 0
+        self.last_time = None
+
+    def add(self, kind, x, y):
+        now = time.perf_counter()
+        delay = 0 if self.last_time is None else min(int((now - self.last_time) * 1000), MAX_DELAY_MS)
+        self.last_time = now
+        if kind == LEFT and self.first_click == (-1, -1):
+            self.first_click = (x, y)
+        self.actions += ACTION.pack((y * self.cols + x) << 1 | kind, delay)
+        self.count += 1
+
+    def to_bytes(self, result='playing'):
+        header = HEADER.pack(MAGIC, VERSION, RESULTS.index(result), self.cols, self.rows, self.bombs,
+                             self.seed, *self.first_click, self.count)
+        return header + bytes(self.actions)
+
+
+class Replay:
+    """Запись партии поверх буфера (bytes, mmap) - ходы не копируются."""
+
+    def __init__(self, buffer, offset=0):
+        (magic, version, result, self.cols, self.rows, self.bombs, self.seed,
+         first_x, first_y, self.count) = HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a replay record at offset {offset}")
+        self.result = RESULTS[result]
+        self.first_click = None if first_x < 0 else (first_x, first_y)
+        start = offset + HEADER.size
+        self.end = start + self.count * ACTION.size
+        self.actions = memoryview(buffer)[start:self.end]
+
+    def iter_actions(self):
+        """(LEFT или RIGHT, x, y, пауза перед ходом в секундах)."""
+        cols = self.cols
+        for code, delay in ACTION.iter_unpack(self.actions):
+            index = code >> 1
+            yield code & 1, index % cols, index // cols, delay / 1000
+
+    def new_game(self):
+        from game import Game
+        return Game(self.cols, self.rows, self.bombs, 'replay', seed=self.seed, save_results=False)
+
+
+def iter_replays(buffer):
+    offset = 0
+    while offset < len(buffer):
+        replay = Replay(buffer, offset)
+        yield replay
+        offset = replay.end
+
+
+class ReplayArchive:
+    """Архив записей, отображённый в память: with ReplayArchive(path) as archive: ..."""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # пустой файл нельзя отобразить
+            self.buffer = b''
+
+    def __iter__(self):
+        return iter_replays(self.buffer)
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            # Ходы прочитанных записей ссылаются на mmap - отпускаем их до закрытия
+            try:
+                self.buffer.close()
+            except BufferError:
+                pass
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def append_replays(path, data):
+    with open(path, 'ab') as f:
+        f.write(data)
+
+
+def apply_action(game, kind, x, y):
+    if kind == LEFT:
+        game.on_left_click(x, y)
+    else:
+        game.on_right_click(x, y)
+
+
+def play(replay):
+    """Проиграть запись без окна и без пауз; возвращает итоговую Game."""
+    game = replay.new_game()
+    for kind, x, y, _ in replay.iter_actions():
+        apply_action(game, kind, x, y)
+    return game
+
+
+def show(replay, speed=1.0):
+    """Показать запись в окне. Пробел - пауза, стрелки вверх/вниз - быстрее/медленнее."""
+    import pygame
+    from renderer import BoardRenderer, Camera, CELL_SIZE, load_cell_images
+
+    pygame.init()
+    width = min(replay.cols * CELL_SIZE, 1200)
+    height = min(replay.rows * CELL_SIZE, 720)
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption(f"Сапёр - запись {replay.seed}")
+    images = load_cell_images()
+    camera = Camera(replay.cols, replay.rows, width, height)
+    renderer = BoardRenderer(images, replay.cols, replay.rows, camera)
+    game = replay.new_game()
+    actions = replay.iter_actions()
+    clock = pygame.time.Clock()
+    paused = False
+    wait = 0.0
+    pending = next(actions, None)
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_UP:
+                    speed *= 2
+                elif event.key == pygame.K_DOWN:
+                    speed /= 2
+        elapsed = clock.tick(60) / 1000
+        if not paused:
+            wait += elapsed * speed
+        while pending is not None and not paused and wait >= pending[3]:
+            wait -= pending[3]
+            apply_action(game, *pending[:3])
+            pending = next(actions, None)
+        rects = renderer.render(screen, game)
+        if rects:
+            pygame.display.update(rects)
+    pygame.quit()
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка и просмотр записей партий")
+    parser.add_argument('archive', nargs='?', default=REPLAY_PATH)
+    parser.add_argument('--show', type=int, metavar='N', help="показать N-ю запись в окне")
+    parser.add_argument('--speed', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with ReplayArchive(args.archive) as archive:
+        if args.show is not None:
+            replay = next(r for i, r in enumerate(archive) if i == args.show)
+            show(replay, args.speed)
+            return
+
+        import audio
+        audio.set_backend(audio.NullAudio())
+        start = time.perf_counter()
+        games = actions = mismatched = 0
+        for replay in archive:
+            game = play(replay)
+            games += 1
+            actions += replay.count
+            mismatched += game.state != replay.result
+        elapsed = time.perf_counter() - start
+    print(f"Записей: {games}, ходов: {actions}, результат не совпал: {mismatched}, {elapsed:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
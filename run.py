@@ -6,7 +6,6 @@ def install_requirements():
     try:
         import pygame
         import tkinter
-        import pandas
         print("[✓] Зависимости уже установлены.")
     except ImportError:
         print("[...] Устанавливаем зависимости...")
@@ -0,0 +1,210 @@
+import argparse
+import os
+import random
+import time
+import multiprocessing
+
+import audio
+from replay import append_replays
+from game import CELL_STATES, DIFFICULTIES, Game
+from placement import SplitMix64
+from solver import MinesweeperSolver
+
+
+def guess_random(game, rng, solver):
+    """Случайная закрытая клетка без флага."""
+    closed = CELL_STATES.index('closed')
+    cells = [(x, y) for y, row in enumerate(game.board.visible_board)
+             for x, state in enumerate(row) if state == closed]
+    return rng.choice(cells)
+
+
+def guess_probability(game, rng, solver):
+    """Клетка с наименьшей точной вероятностью мины."""
+    x, y, _ = solver.safest_guess()
+    return x, y
+
+
+STRATEGIES = {
+    'random': guess_random,
+    'probability': guess_probability,
+}
+
+# Партии делятся на блоки фиксированного размера, у каждого блока свой
+# генератор. Разбиение не зависит от числа процессов, поэтому результат
+# с одним seed одинаков и при workers=1, и при workers=N.
+CHUNK_SIZE = 500
+
+
+class SimulationStats:
+    """Накопительная статистика партий: хранит только суммы, не сами партии."""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.total_time = 0.0
+        self.total_guesses = 0
+        self.solver_steps = 0
+        self.solver_time = 0.0
+        # Записи партий (replay), если их просили сохранить
+        self.replays = bytearray()
+
+    def add(self, won, duration, guesses, steps=0, solve_time=0.0):
+        self.games += 1
+        self.wins += won
+        self.total_time += duration
+        self.total_guesses += guesses
+        self.solver_steps += steps
+        self.solver_time += solve_time
+
+    def merge(self, other):
+        self.games += other.games
+        self.wins += other.wins
+        self.total_time += other.total_time
+        self.total_guesses += other.total_guesses
+        self.solver_steps += other.solver_steps
+        self.solver_time += other.solver_time
+        self.replays += other.replays
+        return self
+
+    def report(self):
+        games = self.games or 1
+        return {
+            'games': self.games,
+            'wins': self.wins,
+            'win_rate': self.wins / games,
+            'avg_time': self.total_time / games,
+            'avg_guesses': self.total_guesses / games,
+            'avg_solver_steps': self.solver_steps / games,
+            'avg_step_time': self.solver_time / (self.solver_steps or 1),
+        }
+
+
+def play_game(cols, rows, bombs, rng, strategy=guess_random, difficulty='', replays=None):
+    """Одна партия без окна: решатель, а когда он застрял - угадывание.
+
+    Возвращает (выиграна ли, сколько раз пришлось угадывать,
+    шагов решателя, секунд в solve_step). Если передан bytearray replays,
+    запись партии дописывается в него.
+    """
+    # У каждой партии своё зерно из потока блока - её можно переиграть по записи
+    game = Game(cols, rows, bombs, difficulty, compact=True, seed=rng.getrandbits(64), save_results=False)
+    # Первый клик всегда безопасен и угадыванием не считается
+    game.on_left_click(rng.randrange(cols), rng.randrange(rows))
+    guesses = 0
+    steps = 0
+    solve_time = 0.0
+    # Решатель один на партию и пересчитывает только то, что изменилось
+    solver = MinesweeperSolver.for_game(game)
+    while True:
+        report = solver.auto_solve()
+        steps += len(report['steps'])
+        solve_time += report['solve_time']
+        if game.state != 'playing':
+            break
+        game.on_left_click(*strategy(game, rng, solver))
+        guesses += 1
+    if replays is not None:
+        replays += game.replay_bytes()
+    return game.state == 'win', guesses, steps, solve_time
+
+
+def chunk_rng(seed, chunk_index):
+    """Независимый детерминированный поток случайных чисел для блока партий."""
+    return SplitMix64(seed, stream=chunk_index + 1)
+
+
+def run_chunk(task):
+    """Сыграть один блок партий; выполняется и в дочерних процессах."""
+    difficulty, strategy, seed, chunk_index, n_games, record = task
+    cols, rows, bombs = DIFFICULTIES[difficulty]
+    guess = STRATEGIES[strategy]
+    rng = chunk_rng(seed, chunk_index)
+    stats = SimulationStats()
+    replays = stats.replays if record else None
+    for _ in range(n_games):
+        start = time.perf_counter()
+        won, guesses, steps, solve_time = play_game(cols, rows, bombs, rng, guess, difficulty, replays)
+        stats.add(won, time.perf_counter() - start, guesses, steps, solve_time)
+    return stats
+
+
+def make_tasks(n_games, difficulty, seed, strategy, record=False):
+    for chunk_index, start in enumerate(range(0, n_games, CHUNK_SIZE)):
+        yield difficulty, strategy, seed, chunk_index, min(CHUNK_SIZE, n_games - start), record
+
+
+def _init_worker():
+    audio.set_backend(audio.NullAudio())
+
+
+def simulate(n_games, difficulty='Легко', seed=None, strategy='random', workers=1, replay_path=None):
+    """Сыграть n_games партий без окна и вернуть сводку SimulationStats.report().
+
+    workers > 1 - блоки партий раздаются пулу процессов, их статистика
+    сливается по мере готовности (imap_unordered), сами партии не хранятся.
+    replay_path - дописать записи всех партий в этот архив (см. replay);
+    при workers > 1 блоки в архиве идут в порядке готовности.
+    """
+    if difficulty not in DIFFICULTIES:
+        raise KeyError(difficulty)
+    if strategy not in STRATEGIES:
+        raise KeyError(strategy)
+    if seed is None:
+        seed = random.getrandbits(64)
+    tasks = make_tasks(n_games, difficulty, seed, strategy, replay_path is not None)
+    stats = SimulationStats()
+
+    if workers > 1:
+        # spawn, а не fork: родитель может держать потоки (pygame, тесты),
+        # и форк такого процесса способен зависнуть на чужой блокировке
+        pool = multiprocessing.get_context('spawn').Pool(workers, initializer=_init_worker)
+        try:
+            for chunk_stats in pool.imap_unordered(run_chunk, tasks):
+                stats.merge(chunk_stats)
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    else:
+        previous_backend = audio.get_backend()
+        audio.set_backend(audio.NullAudio())
+        try:
+            for task in tasks:
+                stats.merge(run_chunk(task))
+        finally:
+            audio.set_backend(previous_backend)
+
+    if replay_path is not None:
+        append_replays(replay_path, stats.replays)
+    return stats.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Безголовая симуляция партий с решателем")
+    parser.add_argument('-n', '--games', type=int, default=1000, help="количество партий")
+    parser.add_argument('-d', '--difficulty', choices=list(DIFFICULTIES), default='Легко')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='random',
+                        help="как угадывать, когда решатель застрял")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--replays', metavar='FILE', help="дописать записи партий в архив replay")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = simulate(args.games, args.difficulty, args.seed, args.strategy, args.workers, args.replays)
+    elapsed = time.perf_counter() - start
+
+    print(f"Партий: {report['games']}, побед: {report['wins']} ({report['win_rate']:.1%})")
+    print(f"Среднее время партии: {report['avg_time'] * 1000:.2f} мс")
+    print(f"Среднее число угадываний: {report['avg_guesses']:.2f}")
+    print(f"Шагов решателя на партию: {report['avg_solver_steps']:.1f}, "
+          f"в среднем {report['avg_step_time'] * 1000:.3f} мс на шаг")
+    print(f"Всего: {elapsed:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import struct
+import time
+
+from compact_board import CompactBoard
+from placement import get_numpy, pack_mine_bits, unpack_mine_bits
+from replay import RESULTS
+
+# Снимок позиции: поле и состояние партии, из которого Game.restore()
+# собирает игру, продолжающуюся с того же места.
+#
+# Формат (little-endian):
+#   заголовок HEADER (42 байта): b'MSSN', версия, состояние партии, флаги
+#       (первый клик сделан / есть seed / таймер запущен), cols, rows,
+#       bombs, флажков, закрытых клеток, seed, секунд с начала партии,
+#       длина названия сложности;
+#   название сложности в UTF-8;
+#   мины - битовое множество, как CompactBoard.mines;
+#   состояния клеток - STATE_BITS битовых плоскостей того же размера:
+#       в плоскости k бит k состояния каждой клетки (CELL_STATES < 8).
+# Числа hidden_board не хранятся - они пересчитываются по минам.
+
+MAGIC = b'MSSN'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBxHHIIIQdH')
+STATE_BITS = 3
+
+FIRST_CLICK_DONE, HAS_SEED, STARTED = 1, 2, 4
+
+
+def pack_states(states, n):
+    """Состояния клеток (по байту на клетку) в STATE_BITS битовых плоскостей."""
+    np = get_numpy()
+    if np is not None:
+        cells = np.frombuffer(states, dtype=np.uint8, count=n)
+        bits = np.unpackbits(cells[:, None], axis=1, bitorder='little')
+        return b''.join(np.packbits(bits[:, k], bitorder='little').tobytes() for k in range(STATE_BITS))
+
+    size = (n + 7) // 8
+    planes = [bytearray(size) for _ in range(STATE_BITS)]
+    for i, state in enumerate(states):
+        if state:
+            byte, bit = i >> 3, 1 << (i & 7)
+            for k in range(STATE_BITS):
+                if state >> k & 1:
+                    planes[k][byte] |= bit
+    return b''.join(planes)
+
+
+def unpack_states(planes, n, out):
+    """Обратное к pack_states: пишет состояния прямо в bytearray out."""
+    size = (n + 7) // 8
+    np = get_numpy()
+    if np is not None:
+        bits = np.unpackbits(np.frombuffer(planes, dtype=np.uint8).reshape(STATE_BITS, size),
+                             axis=1, bitorder='little')[:, :n]
+        cells = np.frombuffer(out, dtype=np.uint8, count=n)
+        cells[:] = bits[0]
+        for k in range(1, STATE_BITS):
+            cells |= bits[k] << k
+        return out
+
+    out[:n] = bytes(n)
+    for k in range(STATE_BITS):
+        value = 1 << k
+        for byte_index, byte in enumerate(planes[k * size:(k + 1) * size]):
+            if byte:
+                base = byte_index << 3
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        out[base + bit] |= value
+    return out
+
+
+def pack_game(game):
+    board = game.board
+    n = game.cols * game.rows
+    if isinstance(board, CompactBoard):
+        mines = board.mines
+        visible = board.visible
+    else:
+        cols = game.cols
+        mines = pack_mine_bits([y * cols + x for x, y in board.bombs], n)
+        visible = bytes(state for row in board.visible_board for state in row)
+
+    flags = FIRST_CLICK_DONE * game.first_click_done
+    if game.seed is not None:
+        flags |= HAS_SEED
+    elapsed = game.elapsed_time
+    if game.start_time is not None:
+        flags |= STARTED
+        if game.state == 'playing':
+            elapsed = time.time() - game.start_time
+    difficulty = game.difficulty.encode('utf-8')
+    header = HEADER.pack(MAGIC, VERSION, RESULTS.index(game.state), flags, game.cols, game.rows,
+                         board.bombs_amount, game.flags, game.closed_cells, game.seed or 0, elapsed,
+                         len(difficulty))
+    return b''.join((header, difficulty, mines, pack_states(visible, n)))
+
+
+class Snapshot:
+    """Снимок поверх буфера (bytes, mmap) - мины и плоскости не копируются."""
+
+    def __init__(self, buffer, offset=0):
+        (magic, version, state, self.flags, self.cols, self.rows, self.bombs, self.flagged,
+         self.closed_cells, seed, self.elapsed, name_size) = HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a board snapshot at offset {offset}")
+        self.state = RESULTS[state]
+        self.seed = seed if self.flags & HAS_SEED else None
+        view = memoryview(buffer)
+        start = offset + HEADER.size
+        self.difficulty = str(view[start:start + name_size], 'utf-8')
+        start += name_size
+        size = (self.cols * self.rows + 7) // 8
+        self.mines = view[start:start + size]
+        self.states = view[start + size:start + size * (1 + STATE_BITS)]
+        self.end = start + size * (1 + STATE_BITS)
+
+    def restore_into(self, game):
+        """Перенести позицию в новую Game того же размера."""
+        board = game.board
+        n = self.cols * self.rows
+        if isinstance(board, CompactBoard):
+            board.mines[:] = self.mines
+            indices = unpack_mine_bits(board.mines, n)
+            unpack_states(self.states, n, board.visible)
+        else:
+            cols = self.cols
+            indices = unpack_mine_bits(self.mines, n)
+            board.bombs = [(i % cols, i // cols) for i in indices]
+            visible = unpack_states(self.states, n, bytearray(n))
+            board.visible_board = [list(visible[y * cols:(y + 1) * cols]) for y in range(self.rows)]
+        if self.flags & FIRST_CLICK_DONE:
+            board.fill_hidden(indices)
+
+        game.state = self.state
+        game.flags = self.flagged
+        game.closed_cells = self.closed_cells
+        game.first_click_done = bool(self.flags & FIRST_CLICK_DONE)
+        if self.state == 'playing':
+            if self.flags & STARTED:
+                game.start_time = time.time() - self.elapsed
+        else:
+            game.start_time = time.time() - self.elapsed
+            game.elapsed_time = self.elapsed
+            # Результат законченной партии уже записан при игре
+            game.result_saved = True
+        return game
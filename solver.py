@@ -1,13 +1,135 @@
-from itertools import combinations
+import time
+
+from game import CELL_STATES
+from probability import combine, enumerate_component, split_components
+
+CLOSED = CELL_STATES.index('closed')
+OPENED = CELL_STATES.index('opened')
+FLAGGED = CELL_STATES.index('flagged')
+
+
+def popcount(mask):
+    # int.bit_count появился только в Python 3.10
+    return bin(mask).count('1')
+
+
+def propagate(cells, constraints):
+    """Вывести безопасные клетки и мины одной компоненты до неподвижной точки.
+
+    Клетки компоненты нумеруются локально, и каждое ограничение становится
+    парой (битовая маска закрытых клеток, число мин). Проверки подмножества,
+    разности и пересечения - одна операция над целыми. Если маска a целиком
+    входит в b, в b & ~a ровно mb - ma мин - это новое ограничение.
+    Найденные мины и безопасные клетки вычёркиваются из всех масок, и
+    так до тех пор, пока ничего нового не выводится.
+
+    Возвращает (безопасные клетки, мины) - списки координат.
+    """
+    bit = {cell: 1 << i for i, cell in enumerate(cells)}
+    pending = {}
+    for closed, mines in constraints:
+        mask = 0
+        for cell in closed:
+            mask |= bit[cell]
+        pending[mask] = mines
+
+    safe = 0
+    mined = 0
+    masks = {}
+    while pending:
+        # Вычёркиваем уже известные клетки, простые правила
+        known = safe | mined
+        reduced = {}
+        for mask, mines in list(masks.items()) + list(pending.items()):
+            mines -= popcount(mask & mined)
+            mask &= ~known
+            if mask and mask not in reduced:
+                reduced[mask] = mines
+        found = False
+        for mask, mines in reduced.items():
+            if mines == 0 and mask & ~safe:
+                safe |= mask
+                found = True
+            elif mines == popcount(mask) and mask & ~mined:
+                mined |= mask
+                found = True
+        if found:
+            masks, pending = {}, reduced
+            continue
+
+        new = set(reduced) - set(masks)
+        masks = reduced
+        pending = {}
+        # Подмножества: каждое новое ограничение против всех пересекающихся
+        for a in new:
+            ma = masks[a]
+            for b, mb in masks.items():
+                if a == b or not a & b:
+                    continue
+                if a & ~b == 0:
+                    diff, mines = b & ~a, mb - ma
+                elif b & ~a == 0:
+                    diff, mines = a & ~b, ma - mb
+                else:
+                    continue
+                if diff not in masks and diff not in pending:
+                    pending[diff] = mines
+
+    return ([cell for cell in cells if safe & bit[cell]],
+            [cell for cell in cells if mined & bit[cell]])
 
-CELL_STATES = ['closed', 'opened', 'flagged', 'bombed', 'nobomb']
 
 class MinesweeperSolver:
-    def __init__(self, visible_board, hidden_board):
+    """Логический решатель.
+
+    Хранит ограничения "среди этих закрытых клеток ровно m мин" для
+    открытых чисел у границы. Подключённый к игре (attach/for_game) он
+    получает изменённые клетки через Game.subscribe и на следующем шаге
+    пересчитывает только ограничения рядом с ними, а выводы (propagate) -
+    только в компонентах границы, где что-то изменилось. Компоненты
+    собираются по индексу "закрытая клетка -> ограничения". Без игры
+    каждый solve_step просматривает всё поле заново.
+    """
+
+    def __init__(self, visible_board, hidden_board, neighbors=None):
         self.visible = visible_board
         self.hidden = hidden_board
         self.rows = len(visible_board)
         self.cols = len(visible_board[0]) if self.rows > 0 else 0
+        # Можно передать board.neighbors, например таблицу соседей CompactBoard
+        if neighbors is not None:
+            self.neighbors = neighbors
+        self.game = None
+        # клетка с числом -> (frozenset закрытых соседей, сколько среди них мин);
+        # флаги вокруг учтены один раз при построении ограничения
+        self.constraints = {}
+        # закрытая клетка -> клетки с числами, в чьи ограничения она входит
+        self.cell_constraints = {}
+        # клетки, чьи ограничения нужно пересчитать; None - всё поле
+        self.dirty = None
+        self.known_safe = set()
+        self.known_mines = set()
+        # набор ограничений компоненты -> результат перебора; компоненты
+        # вдали от последних ходов между вызовами не меняются
+        self.component_cache = {}
+
+    @classmethod
+    def for_game(cls, game):
+        solver = cls(game.board.visible_board, game.board.hidden_board, neighbors=game.board.neighbors)
+        solver.attach(game)
+        return solver
+
+    def attach(self, game):
+        self.game = game
+        self.dirty = None
+        game.subscribe(self.notify)
+
+    def notify(self, changed):
+        if self.dirty is None:
+            return
+        for x, y in changed:
+            self.dirty.add((x, y))
+            self.dirty.update(self.neighbors(x, y))
 
     def in_range(self, x, y):
         return 0 <= x < self.cols and 0 <= y < self.rows
@@ -18,76 +140,152 @@ class MinesweeperSolver:
                 if (nx, ny) != (x, y) and self.in_range(nx, ny):
                     yield (nx, ny)
 
+    def constraint_at(self, x, y):
+        if self.visible[y][x] != OPENED:
+            return None
+        num = self.hidden[y][x]
+        if num <= 0:
+            return None
+        flagged = 0
+        closed = []
+        for nx, ny in self.neighbors(x, y):
+            state = self.visible[ny][nx]
+            if state == FLAGGED:
+                flagged += 1
+            elif state == CLOSED:
+                closed.append((nx, ny))
+        if not closed:
+            return None
+        return frozenset(closed), num - flagged
+
+    def set_constraint(self, cell, constraint):
+        index = self.cell_constraints
+        old = self.constraints.pop(cell, None)
+        if old is not None:
+            for closed_cell in old[0]:
+                owners = index[closed_cell]
+                owners.discard(cell)
+                if not owners:
+                    del index[closed_cell]
+        if constraint is not None:
+            self.constraints[cell] = constraint
+            for closed_cell in constraint[0]:
+                index.setdefault(closed_cell, set()).add(cell)
+
+    def update_constraints(self):
+        """Пересчитать ограничения изменившихся клеток и вернуть затронутые."""
+        if self.game is not None:
+            # Board заменяет hidden_board при расстановке мин
+            self.hidden = self.game.board.hidden_board
+
+        if self.dirty is None or self.game is None:
+            self.constraints = {}
+            self.cell_constraints = {}
+            self.known_safe = set()
+            self.known_mines = set()
+            cells = [(x, y) for y in range(self.rows) for x in range(self.cols)]
+        else:
+            cells = self.dirty
+        self.dirty = set()
+
+        touched = set()
+        for x, y in cells:
+            constraint = self.constraint_at(x, y)
+            if constraint != self.constraints.get((x, y)):
+                self.set_constraint((x, y), constraint)
+                if constraint is not None:
+                    touched.add((x, y))
+
+        # Уже найденные ходы, которые кто-то успел сделать, больше не нужны
+        self.known_safe = {(x, y) for x, y in self.known_safe if self.visible[y][x] == CLOSED}
+        self.known_mines = {(x, y) for x, y in self.known_mines if self.visible[y][x] == CLOSED}
+        return touched
+
     def solve_step(self):
-        actions = []
-        known_safe = set()
-        known_mines = set()
-
-        for y in range(self.rows):
-            for x in range(self.cols):
-                if self.visible[y][x] == CELL_STATES.index('opened'):
-                    num = self.hidden[y][x]
-                    if num <= 0:
-                        continue
-
-                    flagged = 0
-                    closed = []
-                    for nx, ny in self.neighbors(x, y):
-                        state = self.visible[ny][nx]
-                        if state == CELL_STATES.index('flagged'):
-                            flagged += 1
-                        elif state == CELL_STATES.index('closed'):
-                            closed.append((nx, ny))
-
-                    # Обычные эвристики
-                    if flagged == num:
-                        known_safe.update(closed)
-                    if flagged + len(closed) == num:
-                        known_mines.update(closed)
-
-        # Добавим логические выводы на основе групп
-        opened_cells = [
-            (x, y) for y in range(self.rows) for x in range(self.cols)
-            if self.visible[y][x] == CELL_STATES.index('opened') and self.hidden[y][x] > 0
-        ]
-
-        for (x1, y1), (x2, y2) in combinations(opened_cells, 2):
-            n1 = set((nx, ny) for nx, ny in self.neighbors(x1, y1)
-                     if self.visible[ny][nx] == CELL_STATES.index('closed'))
-            n2 = set((nx, ny) for nx, ny in self.neighbors(x2, y2)
-                     if self.visible[ny][nx] == CELL_STATES.index('closed'))
-
-            f1 = sum(1 for nx, ny in self.neighbors(x1, y1)
-                     if self.visible[ny][nx] == CELL_STATES.index('flagged'))
-            f2 = sum(1 for nx, ny in self.neighbors(x2, y2)
-                     if self.visible[ny][nx] == CELL_STATES.index('flagged'))
-
-            m1 = self.hidden[y1][x1] - f1
-            m2 = self.hidden[y2][x2] - f2
-
-            if n1 and n2:
-                if n1.issubset(n2) and m1 == m2:
-                    # n2 - n1 точно безопасны
-                    known_safe.update(n2 - n1)
-                elif n2.issubset(n1) and m2 == m1:
-                    known_safe.update(n1 - n2)
-                elif n1.issubset(n2) and (m2 - m1) == len(n2 - n1):
-                    known_mines.update(n2 - n1)
-                elif n2.issubset(n1) and (m1 - m2) == len(n1 - n2):
-                    known_mines.update(n1 - n2)
+        touched = self.update_constraints()
+        # Выводы не выходят за пределы компоненты границы, поэтому
+        # пересчитываются только компоненты с изменившимися ограничениями
+        starts = {cell for owner in touched for cell in self.constraints[owner][0]}
+        for cells, constraints in split_components(self.constraints, self.cell_constraints, starts):
+            safe, mines = propagate(cells, constraints)
+            self.known_safe.update(safe)
+            self.known_mines.update(mines)
 
         # Преобразуем в действия
-        for (x, y) in known_safe:
-            actions.append(('open', x, y))
-        for (x, y) in known_mines:
-            actions.append(('flag', x, y))
-
-        # Удаляем дубли
-        unique_actions = []
-        seen = set()
-        for act in actions:
-            if (act[0], act[1], act[2]) not in seen:
-                unique_actions.append(act)
-                seen.add((act[0], act[1], act[2]))
-
-        return unique_actions
+        actions = [('open', x, y) for x, y in sorted(self.known_safe)]
+        actions += [('flag', x, y) for x, y in sorted(self.known_mines)]
+        return actions
+
+    def auto_solve(self, max_steps=None):
+        """Решать подключённую игру, пока есть однозначные ходы.
+
+        Ходы каждого шага применяются пакетом (Game.apply_actions), без
+        звука и перерисовки на каждый ход. Останавливается, когда игра
+        окончена, решатель ничего не нашёл или сделано max_steps шагов.
+        Возвращает словарь: state - состояние игры, steps - список
+        (секунд на solve_step, сколько клеток изменил шаг), solve_time и
+        resolved - их суммы.
+        """
+        game = self.game
+        steps = []
+        while game.state == 'playing' and (max_steps is None or len(steps) < max_steps):
+            start = time.perf_counter()
+            actions = self.solve_step()
+            elapsed = time.perf_counter() - start
+            if not actions:
+                break
+            steps.append((elapsed, len(game.apply_actions(actions))))
+        return {
+            'state': game.state,
+            'steps': steps,
+            'solve_time': sum(seconds for seconds, _ in steps),
+            'resolved': sum(cells for _, cells in steps),
+        }
+
+    def probabilities(self, bombs_amount=None):
+        """Точные вероятности мин для закрытых клеток без флагов.
+
+        Возвращает (словарь клетка границы -> вероятность, вероятность для
+        любой закрытой клетки вне границы или None, если таких нет).
+        Флаги считаются верными. bombs_amount берётся из игры, если
+        решатель к ней подключён.
+        """
+        self.update_constraints()
+        if bombs_amount is None:
+            bombs_amount = self.game.board.bombs_amount
+        if self.game is not None:
+            closed = self.game.closed_cells - self.game.flags
+            flagged = self.game.flags
+        else:
+            states = [state for row in self.visible for state in row]
+            closed = states.count(CLOSED)
+            flagged = states.count(FLAGGED)
+
+        cache = {}
+        components = []
+        for cells, constraints in split_components(self.constraints, self.cell_constraints):
+            key = frozenset(constraints)
+            result = self.component_cache.get(key)
+            if result is None:
+                result = enumerate_component(cells, constraints)
+            cache[key] = result
+            components.append((cells,) + result)
+        self.component_cache = cache
+
+        interior = closed - len(self.cell_constraints)
+        return combine(components, bombs_amount - flagged, interior)
+
+    def safest_guess(self, bombs_amount=None):
+        """Закрытая клетка с наименьшей вероятностью мины: (x, y, вероятность)."""
+        probs, interior_prob = self.probabilities(bombs_amount)
+        best = min(probs.items(), key=lambda item: (item[1], item[0]), default=None)
+        if interior_prob is not None and (best is None or interior_prob < best[1]):
+            # Среди равных внутренних клеток углы чаще оказываются нулями
+            corners = [(0, 0), (self.cols - 1, 0), (0, self.rows - 1), (self.cols - 1, self.rows - 1)]
+            cells = corners + [(x, y) for y in range(self.rows) for x in range(self.cols)]
+            cell = next(cell for cell in cells
+                        if self.visible[cell[1]][cell[0]] == CLOSED and cell not in self.cell_constraints)
+            return cell + (interior_prob,)
+        if best is None:
+            return None
+        return best[0] + (best[1],)
@@ -0,0 +1,199 @@
+import csv
+import queue
+import threading
+
+import analytics
+import db
+
+
+def export_csv(path, conn=None, difficulty=None):
+    """Выгрузить результаты в CSV построчно, без pandas."""
+    own = conn is None
+    conn = conn or db.connect()
+    try:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(db.RESULT_COLUMNS)
+            writer.writerows(db.iter_results(conn, difficulty))
+    finally:
+        if own:
+            conn.close()
+
+
+def results_dataframe(conn=None, difficulty=None):
+    """Результаты как pandas.DataFrame - для анализа; pandas нужен только здесь."""
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("results_dataframe требует pandas: pip install pandas") from None
+    own = conn is None
+    conn = conn or db.connect()
+    try:
+        return pd.DataFrame.from_records(db.iter_results(conn, difficulty), columns=db.RESULT_COLUMNS)
+    finally:
+        if own:
+            conn.close()
+
+
+DIFFICULTIES = ['Легко', 'Средне', 'Сложно']
+TITLES = {'Легко': 'Легкий', 'Средне': 'Средний', 'Сложно': 'Сложный'}
+
+
+def load_statistics(path=db.DB_PATH, cache=db.query_cache):
+    """Данные окна: {сложность: (лучшие времена [(дата, время), ...], analytics-сводка)}.
+
+    Запросы идут через cache; соединение открывается только при промахе.
+    """
+    conn = None
+
+    def connection():
+        nonlocal conn
+        if conn is None:
+            conn = db.connect(path)
+        return conn
+
+    try:
+        return {difficulty: (
+            cache.get(path, 'best_times', difficulty, lambda: db.best_times(connection(), difficulty)),
+            cache.get(path, 'report', difficulty, lambda: analytics.difficulty_report(connection(), difficulty)),
+        ) for difficulty in DIFFICULTIES}
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+class StatsWindow:
+    """Одно окно статистики на всё время работы игры.
+
+    Окно живёт в главном потоке: игровой цикл каждый кадр вызывает pump(),
+    который обрабатывает события Tk (root.update) вместо mainloop. Данные
+    читаются в фоновом потоке и попадают в таблицы при следующем pump().
+    Когда писатель результатов (db.writer) сохраняет новые партии, окно
+    перечитывает данные само. Закрытие окна только прячет его.
+    """
+
+    def __init__(self, loader=load_statistics, writer=None):
+        self.loader = loader
+        self.writer = writer or db.writer
+        self.root = None
+        self.trees = {}
+        self.summaries = {}
+        self.visible = False
+        self.loading = False
+        self.loaded_version = None
+        self.results = queue.Queue()
+
+    def show(self):
+        if self.root is None:
+            self._build()
+        else:
+            self.root.deiconify()
+            self.root.lift()
+        self.visible = True
+        # Перечитываем, только если с прошлой загрузки появились результаты
+        if self.loaded_version != self.writer.version:
+            self.refresh()
+
+    def hide(self):
+        self.visible = False
+        if self.root is not None:
+            self.root.withdraw()
+
+    def refresh(self):
+        if self.loading:
+            return
+        self.loading = True
+        version = self.writer.version
+        threading.Thread(target=self._load, args=(version,), daemon=True).start()
+
+    def _load(self, version):
+        try:
+            data = self.loader()
+        except Exception as e:
+            print(f"[ERROR] Failed to load statistics: {e}")
+            data = None
+        self.results.put((version, data))
+
+    def pump(self):
+        """Один шаг окна; вызывается из игрового цикла каждый кадр."""
+        if self.root is None:
+            return
+        try:
+            version, data = self.results.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            self.loading = False
+            self.loaded_version = version
+            if data is not None:
+                self._fill(data)
+        if self.visible and not self.loading and self.loaded_version != self.writer.version:
+            self.refresh()
+        self._update()
+
+    def close(self):
+        if self.root is not None:
+            self.root.destroy()
+            self.root = None
+            self.trees = {}
+            self.summaries = {}
+        self.visible = False
+
+    def _build(self):
+        # tkinter нужен только окну статистики - импортируем здесь
+        import tkinter as tk
+        from tkinter import ttk
+
+        self.root = tk.Tk()
+        self.root.title("🏆 Статистика лучших результатов")
+        self.root.geometry("560x720")
+        self.root.protocol("WM_DELETE_WINDOW", self.hide)
+
+        for i, difficulty in enumerate(DIFFICULTIES):
+            label = tk.Label(self.root, text=f"🏅 {TITLES[difficulty]}", font=("Arial", 12, "bold"))
+            label.pack(pady=(10 if i == 0 else 5, 0))
+
+            tree = ttk.Treeview(self.root, columns=("date", "duration"), show="headings", height=5)
+            tree.heading("date", text="Дата")
+            tree.heading("duration", text="Время (сек)")
+            tree.pack(pady=5)
+            self.trees[difficulty] = tree
+
+            summary = tk.Label(self.root, justify="left", font=("Arial", 9))
+            summary.pack()
+            self.summaries[difficulty] = summary
+
+    def _fill(self, data):
+        # Лучшие времена ведёт триггер в таблице best_times (см. db.MIGRATIONS)
+        for difficulty, tree in self.trees.items():
+            best, report = data.get(difficulty, ([], None))
+            tree.delete(*tree.get_children())
+            for date, duration in best:
+                tree.insert("", "end", values=(date, round(duration, 2)))
+            if report is not None:
+                self.summaries[difficulty].config(text=analytics.format_report(report))
+
+    def _update(self):
+        import tkinter as tk
+        try:
+            self.root.update()
+        except tk.TclError:  # окно разрушено снаружи
+            self.root = None
+            self.trees = {}
+            self.summaries = {}
+            self.visible = False
+
+
+stats_window = StatsWindow()
+
+
+def show_statistics_window():
+    stats_window.show()
+
+
+def pump_statistics_window():
+    stats_window.pump()
+
+
+def close_statistics_window():
+    stats_window.close()
@@ -0,0 +1,69 @@
+import pygame
+
+# Смещения обводки: текст сдвигается на 1 пиксель в 8 направлениях
+OUTLINE_OFFSETS = [(-1, -1), (-1, 0), (-1, 1),
+                   (0, -1), (0, 1),
+                   (1, -1), (1, 0), (1, 1)]
+
+RESET_IMAGE_SIZE = (40, 40)
+
+
+def render_outlined(font, text, color, outline_color):
+    """Текст с обводкой, собранный в одну поверхность (2 рендера вместо 9)."""
+    text_surface = font.render(text, True, color)
+    outline_surface = font.render(text, True, outline_color)
+    width, height = text_surface.get_size()
+    surface = pygame.Surface((width + 2, height + 2), pygame.SRCALPHA)
+    for dx, dy in OUTLINE_OFFSETS:
+        surface.blit(outline_surface, (1 + dx, 1 + dy))
+    surface.blit(text_surface, (1, 1))
+    return surface
+
+
+class UIAssets:
+    """Кеш поверхностей интерфейса для главного цикла.
+
+    Статичные надписи и уменьшенные картинки reset рендерятся один раз,
+    счётчик и таймер - только когда меняется их значение, сообщение
+    с обводкой - одной готовой поверхностью.
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self.labels = {}
+        self.values = {}
+        self.reset_images = {}
+        self.messages = {}
+
+    def label(self, text, color, font=None):
+        font = font or self.font
+        key = (text, color, id(font))
+        surface = self.labels.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self.labels[key] = surface
+        return surface
+
+    def value(self, slot, text, color):
+        # Одна запись на слот: старое значение вытесняется новым
+        cached = self.values.get(slot)
+        if cached is None or cached[0] != (text, color):
+            cached = ((text, color), self.font.render(text, True, color))
+            self.values[slot] = cached
+        return cached[1]
+
+    def reset_image(self, reset_imgs, state):
+        image = reset_imgs[state]
+        cached = self.reset_images.get(state)
+        if cached is None or cached[0] is not image:
+            cached = (image, pygame.transform.smoothscale(image, RESET_IMAGE_SIZE))
+            self.reset_images[state] = cached
+        return cached[1]
+
+    def message(self, font, text, color, outline_color):
+        key = (text, color, outline_color, id(font))
+        surface = self.messages.get(key)
+        if surface is None:
+            surface = render_outlined(font, text, color, outline_color)
+            self.messages[key] = surface
+        return surface